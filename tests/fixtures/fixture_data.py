@@ -3,6 +3,7 @@ import tempfile
 import pytest
 from mixer.backend.django import mixer as _mixer
 from posts.models import Post, Group
+from posts.seeding import seed
 
 
 @pytest.fixture()
@@ -45,3 +46,9 @@ def few_posts_with_group(mixer, user, group):
 def another_few_posts_with_group_with_follower(mixer, user, another_user, group):
     mixer.blend('posts.Follow', user=user, author=another_user)
     mixer.cycle(20).blend(Post, author=another_user, group=group)
+
+
+@pytest.fixture
+def seeded_data(db):
+    """Bulk-created users, groups, posts, comments and follows."""
+    return seed(users=20, groups=3, posts=100, comments=50, follows=3)
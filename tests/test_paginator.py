@@ -51,3 +51,14 @@ class TestGroupPaginatorView:
             'Проверьте, что переменная `paginator` объекта `page_obj`'
             ' на странице `/profile/<username>/` типа `Paginator`'
         )
+
+    def test_index_paginator_with_seeded_data(self, client, seeded_data):
+        cache.clear()
+        response = client.get('/')
+        page_obj = response.context['page_obj']
+        assert page_obj.paginator.count == seeded_data['posts'], (
+            'Проверьте, что на странице `/` пагинируются все посты'
+        )
+        assert len(page_obj) == 10, (
+            'Проверьте, что на первой странице `/` выводится 10 постов'
+        )
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .views import ABOUT_MAX_AGE
+
+User = get_user_model()
+
+
+class AboutCacheTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(
+            User.objects.create_user(username='user'))
+
+    def test_about_pages_public_for_anonymous(self):
+        """Страницы about кэшируются публично для анонимов."""
+        for name in ('about:author', 'about:tech'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(reverse(name))
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn(f'max-age={ABOUT_MAX_AGE}',
+                              response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_about_pages_private_for_user(self):
+        """Авторизованному пользователю страница не кэшируется публично."""
+        for name in ('about:author', 'about:tech'):
+            with self.subTest(name=name):
+                response = self.authorized_client.get(reverse(name))
+                self.assertIn('private', response['Cache-Control'])
+                self.assertNotIn('public', response['Cache-Control'])
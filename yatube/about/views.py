@@ -1,9 +1,16 @@
+from django.utils.decorators import method_decorator
 from django.views.generic.base import TemplateView
 
+from core.http import cache_policy
 
+ABOUT_MAX_AGE: int = 60 * 60 * 24
+
+
+@method_decorator(cache_policy(ABOUT_MAX_AGE), name='dispatch')
 class IMommyHere(TemplateView):
     template_name = 'about/author.html'
 
 
+@method_decorator(cache_policy(ABOUT_MAX_AGE), name='dispatch')
 class Tech(TemplateView):
     template_name = 'about/tech.html'
@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'finished',
+        'progress',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+
+
+admin.site.register(Task, TaskAdmin)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import outbox  # noqa: F401 — периодическая задача dispatch
+
+        # Регистрирует задачи и потребителей outbox из приложений
+        autodiscover_modules('tasks', 'consumers')
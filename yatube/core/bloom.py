@@ -0,0 +1,41 @@
+"""Фильтр Блума: компактное множество с ложными срабатываниями.
+
+Ответ «нет» точен, ответ «может быть» ошибается с вероятностью около
+error_rate. Фильтр пикируется и хранится в кэше Django целиком.
+"""
+import hashlib
+import math
+
+ERROR_RATE: float = 0.01
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(int(math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_iterable(cls, items, capacity, error_rate=ERROR_RATE):
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        # Двойное хеширование: k позиций из двух половин одного дайджеста.
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size
+                for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
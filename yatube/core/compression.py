@@ -0,0 +1,44 @@
+"""Сжатие gzip и Brotli. Без пакета brotli сжатие Brotli пропускается."""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL: int = 9
+BROTLI_QUALITY: int = 11
+
+
+def gzip_bytes(data, level=GZIP_LEVEL):
+    # mtime=0 делает результат одинаковым при каждой сборке
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data, quality=BROTLI_QUALITY):
+    if brotli is None:
+        return None
+    return brotli.compress(data, quality=quality)
+
+
+def compressors():
+    """Доступные кодировки по убыванию предпочтения.
+
+    Каждая задана кортежем (имя, расширение файла, функция сжатия).
+    """
+    available = [('gzip', '.gz', gzip_bytes)]
+    if brotli is not None:
+        available.insert(0, ('br', '.br', brotli_bytes))
+    return available
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
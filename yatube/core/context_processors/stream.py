@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def stream(request):
+    """Адрес потока новых записей для страниц с лентами."""
+    return {
+        'stream_url': settings.STREAM_URL,
+    }
@@ -0,0 +1,49 @@
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+CACHEABLE_STATUSES = (200, 304)
+
+
+def cache_policy(max_age):
+    """Публичное кэширование на max_age секунд только для анонимов.
+
+    Страницы авторизованных пользователей персональны (имя в шапке,
+    кнопки подписки, CSRF-токен), поэтому для них ответ приватный и
+    всегда перепроверяется. Vary: Cookie не даёт CDN отдать анонимную
+    копию пользователю с сессией и наоборот.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if response.status_code not in CACHEABLE_STATUSES:
+                return response
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, max_age=max_age)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def condition_for_anonymous(etag_func=None, last_modified_func=None):
+    """Отвечает анонимам 304 по If-None-Match или If-Modified-Since.
+
+    Проверка идёт до рендера шаблона, как в django condition.
+    """
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag_func,
+            last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            return conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
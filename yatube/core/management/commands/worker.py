@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import POLL_INTERVAL, Worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=os.cpu_count() or 1,
+            help='Процессов в пуле; 0 — выполнять задачи в самом воркере.')
+        parser.add_argument('--poll', type=float, default=POLL_INTERVAL,
+                            help='Пауза между опросами пустой очереди.')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.')
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options['concurrency'],
+                        poll_interval=options['poll'])
+        processed = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {processed}'))
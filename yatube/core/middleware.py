@@ -0,0 +1,167 @@
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .compression import accepted_encodings, compressors
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE_MAX_AGE: int = 60 * 60 * 24 * 365
+STATIC_MAX_AGE: int = 60 * 60
+VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESS_MIN_SIZE: int = 512
+COMPRESSED_CACHE_TIMEOUT: int = 60 * 10
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+# Уровни сжатия: общие ответы сжимаются один раз и сильнее,
+# персональные — на каждый запрос и быстрее
+SHARED_LEVELS = {'br': 9, 'gzip': 9}
+PERSONAL_LEVELS = {'br': 4, 'gzip': 6}
+
+
+@lru_cache(maxsize=1024)
+def find_static_file(root, name):
+    """Путь к файлу в STATIC_ROOT и его сжатые копии по кодировкам.
+
+    После collectstatic файлы не меняются, поэтому результат запоминается
+    и файловая система не опрашивается на каждый запрос.
+    """
+    try:
+        path = safe_join(root, name)
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    if not os.path.isfile(path):
+        return None
+    variants = {
+        encoding: path + extension
+        for encoding, extension in VARIANTS
+        if os.path.isfile(path + extension)
+    }
+    return path, variants
+
+
+class StaticFilesMiddleware:
+    """Раздаёт собранную статику с заранее сжатыми копиями.
+
+    Файлы с хэшем содержимого в имени отдаются с кэшированием на год,
+    потому что при изменении файла меняется и имя. Включается настройкой
+    STATIC_SERVE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (settings.STATIC_SERVE
+                and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(settings.STATIC_URL)):
+            name = request.path_info[len(settings.STATIC_URL):]
+            found = find_static_file(settings.STATIC_ROOT, name)
+            if found is not None:
+                return self.serve(request, name, *found)
+        return self.get_response(request)
+
+    def serve(self, request, name, path, variants):
+        encoding = None
+        accepted = accepted_encodings(request)
+        for candidate, _ in VARIANTS:
+            if candidate in accepted and candidate in variants:
+                encoding, path = candidate, variants[candidate]
+                break
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}-{encoding or ""}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type = (mimetypes.guess_type(name)[0]
+                            or 'application/octet-stream')
+            response = FileResponse(open(path, 'rb'),
+                                    content_type=content_type)
+            response['Content-Length'] = stat.st_size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        if HASHED_NAME.search(name):
+            patch_cache_control(response, public=True,
+                                max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True,
+                                max_age=STATIC_MAX_AGE)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы Brotli или gzip в зависимости от Accept-Encoding.
+
+    Уже сжатые ответы, медиа и потоковые ответы не трогает. Сжатое тело
+    общих ответов (Cache-Control: public и без Set-Cookie), например
+    страниц из полностраничного кэша, кладётся в кэш по хэшу исходного
+    тела, так что горячая страница сжимается один раз, а не на каждый
+    запрос. Остальные ответы, как и страницы без политики кэширования с
+    CSRF-токеном, уникальны и сжимаются быстро и без кэша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request)
+        for encoding, _, compress in compressors():
+            if encoding in accepted:
+                break
+        else:
+            return response
+        shared = self.shared(response)
+        levels = SHARED_LEVELS if shared else PERSONAL_LEVELS
+        content = response.content
+        key = None
+        compressed = None
+        if shared:
+            digest = hashlib.md5(content).hexdigest()
+            key = f'compressed:{encoding}:{digest}'
+            compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(content, levels[encoding])
+            if key:
+                cache.set(key, compressed, COMPRESSED_CACHE_TIMEOUT)
+        if len(compressed) >= len(content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def compressible(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.has_header('Content-Encoding')
+            and response.get('Content-Type', '').startswith(
+                COMPRESSIBLE_TYPES)
+            and len(response.content) >= COMPRESS_MIN_SIZE
+        )
+
+    def shared(self, response):
+        directives = {
+            directive.split('=')[0].strip().lower()
+            for directive in response.get('Cache-Control', '').split(',')
+        }
+        return not response.cookies and 'public' in directives
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='progress',
+            field=models.CharField(blank=True, help_text='Задача пишет его сама через report_progress', max_length=200, verbose_name='Ход выполнения'),
+        ),
+    ]
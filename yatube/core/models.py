@@ -0,0 +1,115 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Отложенный вызов функции из очереди фоновых задач."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(
+        verbose_name='Функция',
+        max_length=200)
+    payload = models.TextField(
+        verbose_name='Аргументы в JSON')
+    priority = models.SmallIntegerField(
+        verbose_name='Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше')
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток не больше',
+        default=3)
+    run_at = models.DateTimeField(
+        verbose_name='Выполнить не раньше',
+        default=timezone.now)
+    started = models.DateTimeField(
+        verbose_name='Начата',
+        null=True,
+        blank=True)
+    finished = models.DateTimeField(
+        verbose_name='Завершена',
+        null=True,
+        blank=True)
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True)
+    progress = models.CharField(
+        verbose_name='Ход выполнения',
+        max_length=200,
+        blank=True,
+        help_text='Задача пишет его сама через report_progress')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'],
+                         name='task_queue_idx'),
+        ]
+
+
+class Event(models.Model):
+    """Событие изменения данных, записанное в одной транзакции с ним."""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = (
+        (CREATED, 'Создан'),
+        (UPDATED, 'Изменён'),
+        (DELETED, 'Удалён'),
+    )
+
+    topic = models.CharField(
+        verbose_name='Тема',
+        max_length=50,
+        help_text='Что изменилось: post, comment, group, follow, user')
+    action = models.CharField(
+        verbose_name='Действие',
+        max_length=10,
+        choices=ACTIONS)
+    object_id = models.PositiveIntegerField(
+        verbose_name='Идентификатор объекта')
+    payload = models.TextField(
+        verbose_name='Данные в JSON',
+        default='{}')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.topic} {self.object_id} {self.action}'
+
+    class Meta:
+        ordering = ['pk']
+
+
+class Checkpoint(models.Model):
+    """Последнее событие, обработанное потребителем outbox."""
+    consumer = models.CharField(
+        verbose_name='Потребитель',
+        max_length=200,
+        unique=True)
+    position = models.BigIntegerField(
+        verbose_name='Последнее событие',
+        default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.consumer}: {self.position}'
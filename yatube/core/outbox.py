@@ -0,0 +1,108 @@
+"""Transactional outbox: журнал изменений контента для фоновых потребителей.
+
+Код, меняющий данные, вызывает record внутри той же транзакции, что и
+само изменение, поэтому событие появляется ровно тогда, когда изменение
+зафиксировано. Потребители читают события по возрастанию id и хранят
+позицию в Checkpoint: обработка пачки и сдвиг позиции идут в одной
+транзакции, так что упавшая пачка будет прочитана снова, а события не
+теряются. id растут в порядке фиксации, пока записи в базу идут
+последовательно, как в SQLite.
+
+    @consumer('search-index')
+    def reindex(events):
+        ...
+"""
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Checkpoint, Event
+from .tasks import task
+
+BATCH_SIZE: int = 500
+DISPATCH_INTERVAL: int = 30
+RETENTION: timedelta = timedelta(days=7)
+CONSUMERS = {}
+
+CREATED = Event.CREATED
+UPDATED = Event.UPDATED
+DELETED = Event.DELETED
+
+
+def _dumps(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder)
+
+
+def record(topic, action, object_id, **payload):
+    """Записывает событие; вызывать внутри транзакции изменения."""
+    return Event.objects.create(topic=topic, action=action,
+                                object_id=object_id,
+                                payload=_dumps(payload))
+
+
+def record_many(topic, action, object_ids, **payload):
+    """События об одном действии над многими объектами одной вставкой."""
+    data = _dumps(payload)
+    return Event.objects.bulk_create(
+        Event(topic=topic, action=action, object_id=object_id,
+              payload=data)
+        for object_id in object_ids)
+
+
+def payload(event):
+    return json.loads(event.payload)
+
+
+def position(name):
+    return (Checkpoint.objects.filter(consumer=name)
+            .values_list('position', flat=True).first() or 0)
+
+
+def consume(name, handler, batch_size=BATCH_SIZE):
+    """Передаёт handler новые события пачками по порядку.
+
+    handler вызывается в транзакции вместе со сдвигом позиции
+    потребителя; возвращает число обработанных событий.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = (Checkpoint.objects.select_for_update()
+                             .get_or_create(consumer=name))
+            events = list(Event.objects.filter(pk__gt=checkpoint.position)
+                          .order_by('pk')[:batch_size])
+            if not events:
+                return processed
+            handler(events)
+            checkpoint.position = events[-1].pk
+            checkpoint.save(update_fields=['position', 'updated'])
+        processed += len(events)
+
+
+def consumer(name, batch_size=BATCH_SIZE):
+    """Регистрирует потребителя, которого периодически вызывает dispatch."""
+    def decorate(handler):
+        CONSUMERS[name] = (handler, batch_size)
+        return handler
+    return decorate
+
+
+def prune():
+    """Удаляет старые события, уже прочитанные всеми потребителями."""
+    events = Event.objects.filter(created__lt=timezone.now() - RETENTION)
+    if CONSUMERS:
+        positions = dict(Checkpoint.objects.filter(consumer__in=CONSUMERS)
+                         .values_list('consumer', 'position'))
+        events = events.filter(
+            pk__lte=min(positions.get(name, 0) for name in CONSUMERS))
+    return events.delete()[0]
+
+
+@task(every=DISPATCH_INTERVAL)
+def dispatch():
+    for name, (handler, batch_size) in CONSUMERS.items():
+        consume(name, handler, batch_size)
+    prune()
@@ -0,0 +1,247 @@
+"""Встроенная очередь фоновых задач поверх базы данных.
+
+Функция с декоратором @task получает метод delay: он записывает вызов в
+таблицу core_task и сразу возвращается, так что запрос не ждёт тяжёлой
+работы. Команда worker забирает задачи по приоритету, выполняет их в
+пуле процессов и повторяет упавшие с экспоненциально растущей паузой.
+Внешний брокер не нужен.
+
+    @task(priority=5)
+    def make_thumbnail(post_id):
+        ...
+
+    make_thumbnail.delay(post.pk)
+"""
+import functools
+import json
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+REGISTRY = {}
+PERIODIC = {}
+MAX_ATTEMPTS: int = 3
+RETRY_DELAY: int = 10
+STALE_AFTER: int = 3600
+POLL_INTERVAL: float = 1.0
+PROGRESS_LENGTH: int = 200
+# Задача, которую сейчас выполняет этот процесс: воркер и процессы пула
+# выполняют по одной задаче за раз
+_current_task = None
+
+
+class TaskFunction:
+    """Функция очереди: обычный вызов выполняет её сразу, delay — в фоне."""
+
+    def __init__(self, func, priority, max_attempts, retry_delay):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, priority=None, eta=None):
+        """Ставит вызов в очередь; eta — не раньше какого момента."""
+        payload = json.dumps({'args': args, 'kwargs': kwargs or {}},
+                             cls=DjangoJSONEncoder)
+        return Task.objects.create(
+            name=self.name,
+            payload=payload,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=eta or timezone.now(),
+        )
+
+
+def task(func=None, *, priority=0, max_attempts=MAX_ATTEMPTS,
+         retry_delay=RETRY_DELAY, every=None):
+    """Регистрирует функцию в очереди задач.
+
+    Аргументы вызова должны сериализоваться в JSON. every — период в
+    секундах, с которым воркер сам ставит задачу в очередь.
+    """
+    def decorate(func):
+        wrapped = TaskFunction(func, priority, max_attempts, retry_delay)
+        REGISTRY[wrapped.name] = wrapped
+        if every:
+            PERIODIC[wrapped.name] = timedelta(seconds=every)
+        return wrapped
+    return decorate(func) if func else decorate
+
+
+def resolve(name):
+    if name not in REGISTRY:
+        import_string(name)
+    return REGISTRY[name]
+
+
+def execute(name, payload, task_id=None):
+    """Выполняет задачу по имени; вызывается и в процессах пула."""
+    global _current_task
+    data = json.loads(payload)
+    _current_task = task_id
+    try:
+        resolve(name).func(*data['args'], **data['kwargs'])
+    finally:
+        _current_task = None
+
+
+def report_progress(text):
+    """Записывает ход текущей задачи в её строку, видную в админке.
+
+    Вне воркера, при обычном вызове функции, ничего не делает.
+    """
+    if _current_task is not None:
+        Task.objects.filter(pk=_current_task).update(
+            progress=text[:PROGRESS_LENGTH])
+
+
+def claim(limit):
+    """Забирает до limit готовых задач, самые приоритетные первыми.
+
+    Задача переводится в RUNNING условным UPDATE, поэтому несколько
+    воркеров не возьмут одну и ту же задачу дважды.
+    """
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at', 'pk')
+        .values_list('pk', flat=True)[:limit])
+    claimed = [
+        pk for pk in candidates
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started=now, attempts=F('attempts') + 1)
+    ]
+    return list(Task.objects.filter(pk__in=claimed)
+                .order_by('-priority', 'run_at', 'pk'))
+
+
+def finish(task, error=None):
+    """Записывает результат; упавшая задача повторяется с паузой."""
+    now = timezone.now()
+    task.finished = now
+    if error is None:
+        task.status = Task.DONE
+    elif task.attempts < task.max_attempts:
+        try:
+            retry_delay = resolve(task.name).retry_delay
+        except ImportError:
+            retry_delay = RETRY_DELAY
+        task.status = Task.QUEUED
+        task.run_at = now + timedelta(
+            seconds=retry_delay * 2 ** (task.attempts - 1))
+    else:
+        task.status = Task.FAILED
+    if error is not None:
+        task.last_error = error
+        logger.warning('Задача %s #%d упала: %s', task.name, task.pk, error)
+    task.save(update_fields=['status', 'run_at', 'finished', 'last_error'])
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, брошенные упавшим воркером."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=STALE_AFTER),
+    ).update(status=Task.QUEUED)
+
+
+def enqueue_periodic(next_runs):
+    now = timezone.now()
+    for name, interval in PERIODIC.items():
+        if next_runs.get(name, now) > now:
+            continue
+        next_runs[name] = now + interval
+        pending = Task.objects.filter(
+            name=name, status__in=(Task.QUEUED, Task.RUNNING))
+        if not pending.exists():
+            REGISTRY[name].delay()
+
+
+def _format_exception(error):
+    return ''.join(traceback.format_exception_only(type(error), error))
+
+
+class Worker:
+    """Цикл выполнения задач.
+
+    При concurrency=0 задачи выполняются в самом процессе воркера, иначе
+    в пуле из concurrency процессов. В режиме burst воркер выходит, как
+    только очередь опустела.
+    """
+
+    def __init__(self, concurrency=0, poll_interval=POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self._running = {}
+
+    def run(self, burst=False):
+        requeue_stale()
+        next_runs = {}
+        pool = None
+        if self.concurrency:
+            pool = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup)
+        try:
+            while True:
+                enqueue_periodic(next_runs)
+                busy = (self._run_pool(pool) if pool
+                        else self._run_inline())
+                if busy:
+                    continue
+                if burst:
+                    return self.processed
+                time.sleep(self.poll_interval)
+        finally:
+            if pool:
+                pool.shutdown()
+
+    def _run_inline(self):
+        tasks = claim(1)
+        for task in tasks:
+            try:
+                execute(task.name, task.payload, task.pk)
+            except Exception:
+                finish(task, traceback.format_exc())
+            else:
+                finish(task)
+            self.processed += 1
+        return bool(tasks)
+
+    def _run_pool(self, pool):
+        running = self._running
+        for task in claim(self.concurrency - len(running)):
+            running[pool.submit(execute, task.name, task.payload,
+                                task.pk)] = task
+        if not running:
+            return False
+        done, _ = wait(running, timeout=self.poll_interval,
+                       return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            finish(running.pop(future),
+                   _format_exception(error) if error else None)
+            self.processed += 1
+        return True
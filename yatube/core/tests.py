@@ -0,0 +1,406 @@
+import gzip
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from . import compression, outbox, tasks
+from .compression import brotli
+from .middleware import (CompressionMiddleware, IMMUTABLE_MAX_AGE,
+                         find_static_file)
+from .models import Checkpoint, Event, Task
+from .views import MEDIA_MAX_AGE
+
+User = get_user_model()
+
+CSS = b'body { color: red; }\n' * 200
+CALLS = []
+
+
+@tasks.task
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task(priority=10)
+def urgent(value):
+    CALLS.append(value)
+
+
+@tasks.task(max_attempts=2, retry_delay=60)
+def broken():
+    raise ValueError('сломалось')
+
+
+@tasks.task
+def reporting(value):
+    tasks.report_progress(f'готово {value}')
+    CALLS.append(value)
+
+
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATIC_SERVE=True,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        find_static_file.cache_clear()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_collectstatic_writes_compressed_variants(self):
+        """Рядом с хэшированным файлом лежат сжатые копии."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        path = os.path.join(self.root, self.hashed)
+        with open(path + '.gz', 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+        self.assertEqual(os.path.exists(path + '.br'), brotli is not None)
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        response = self.client.get(f'/static/{self.hashed}',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn(f'max-age={IMMUTABLE_MAX_AGE}',
+                      response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_plain_file_without_accept_encoding(self):
+        response = self.client.get(f'/static/{self.hashed}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_unhashed_name_short_cache_and_etag(self):
+        response = self.client.get('/static/css/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response = self.client.get('/static/css/site.css',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_path_traversal_is_not_served(self):
+        self.assertIsNone(find_static_file(self.root, '../manage.py'))
+        self.assertIsNone(find_static_file(self.root, 'css/missing.css'))
+
+
+class StylesheetTests(TestCase):
+    def test_stylesheet_loaded_once(self):
+        """Стили подключаются один раз и по абсолютному адресу."""
+        content = Client().get('/about/tech/').content.decode()
+        self.assertEqual(content.count('bootstrap.min.css'), 1)
+        self.assertIn('href="/static/css/bootstrap.min.css"', content)
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.body = 'Пост о чём-то интересном. '.encode() * 100
+
+    def respond(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return middleware(request)
+
+    def test_negotiates_encoding(self):
+        cases = [('gzip', 'gzip'), ('gzip, deflate', 'gzip'),
+                 ('identity', None), ('gzip;q=0', None)]
+        if brotli is not None:
+            cases += [('gzip, br', 'br'), ('br;q=0, gzip', 'gzip')]
+        for accept, expected in cases:
+            with self.subTest(accept=accept):
+                response = self.respond(HttpResponse(self.body), accept)
+                self.assertEqual(response.get('Content-Encoding'), expected)
+                self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_body(self):
+        response = self.respond(HttpResponse(self.body))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'],
+                         str(len(response.content)))
+
+    def test_skips_media_and_compressed(self):
+        image = HttpResponse(self.body, content_type='image/jpeg')
+        compressed = HttpResponse(self.body)
+        compressed['Content-Encoding'] = 'br'
+        for response in (image, compressed, HttpResponse(b'short')):
+            with self.subTest(response=response):
+                result = self.respond(response)
+                self.assertNotEqual(result.get('Content-Encoding'), 'gzip')
+
+    def public_response(self):
+        response = HttpResponse(self.body)
+        response['Cache-Control'] = 'public, max-age=0'
+        return response
+
+    def test_shared_response_compressed_once(self):
+        """Одинаковое общее тело сжимается один раз."""
+        with mock.patch.object(compression, 'gzip_bytes',
+                               wraps=compression.gzip_bytes) as spy:
+            with mock.patch.object(compression, 'brotli', None):
+                first = self.respond(self.public_response())
+                second = self.respond(self.public_response())
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_personal_response_not_cached(self):
+        """Приватные ответы и ответы без политики не кэшируются."""
+        for cache_control in ('private', None):
+            with mock.patch.object(compression, 'gzip_bytes',
+                                   wraps=compression.gzip_bytes) as spy:
+                with mock.patch.object(compression, 'brotli', None):
+                    for _ in range(2):
+                        response = HttpResponse(self.body)
+                        if cache_control:
+                            response['Cache-Control'] = cache_control
+                        self.respond(response)
+            with self.subTest(cache_control=cache_control):
+                self.assertEqual(spy.call_count, 2)
+
+    def test_page_served_compressed(self):
+        User.objects.create_user(username='author')
+        response = Client().get('/profile/author/',
+                                HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('author', gzip.decompress(response.content).decode())
+
+
+class MediaServingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.data = bytes(range(256)) * 4
+        os.makedirs(os.path.join(cls.root, 'posts'))
+        with open(os.path.join(cls.root, 'posts', 'small.gif'), 'wb') as f:
+            f.write(cls.data)
+        cls.settings = override_settings(MEDIA_ROOT=cls.root)
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = '/media/posts/small.gif'
+
+    def test_full_file_with_cache_headers(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn(f'max-age={MEDIA_MAX_AGE}', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        """Отдаётся запрошенный диапазон байт."""
+        size = len(self.data)
+        cases = (
+            ('bytes=0-9', 0, 9),
+            ('bytes=1000-', 1000, size - 1),
+            ('bytes=-24', size - 24, size - 1),
+            ('bytes=1000-5000', 1000, size - 1),
+        )
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'],
+                                 f'bytes {start}-{end}/{size}')
+                self.assertEqual(b''.join(response.streaming_content),
+                                 self.data[start:end + 1])
+
+    def test_unsatisfiable_and_stale_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9',
+                                   HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_front_server_offload(self):
+        """Файл передаётся фронтовому серверу без чтения в Django."""
+        with self.settings_for('nginx'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Accel-Redirect'],
+                             '/protected-media/posts/small.gif')
+            self.assertEqual(response.content, b'')
+        with self.settings_for('sendfile'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Sendfile'],
+                             os.path.join(self.root, 'posts', 'small.gif'))
+
+    def settings_for(self, server):
+        return override_settings(MEDIA_SERVER=server)
+
+    def test_missing_and_traversal(self):
+        for url in ('/media/posts/missing.gif', '/media/../manage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+        self.worker = tasks.Worker(concurrency=0)
+        # Периодические задачи приложений здесь не нужны
+        patcher = mock.patch.dict(tasks.PERIODIC, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_delay_queues_and_worker_runs(self):
+        """delay только записывает задачу, выполняет её воркер."""
+        task = record.delay('первая')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(self.worker.run(burst=True), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(CALLS, ['первая'])
+
+    def test_priority_order(self):
+        record.delay('обычная')
+        urgent.delay('срочная')
+        record.enqueue(('отложенная',),
+                       eta=timezone.now() + timedelta(hours=1))
+        self.worker.run(burst=True)
+        self.assertEqual(CALLS, ['срочная', 'обычная'])
+
+    def test_retry_with_backoff_then_fail(self):
+        """Упавшая задача повторяется позже, а потом помечается упавшей."""
+        task = broken.delay()
+        started = timezone.now()
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.worker.run(burst=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreaterEqual(task.run_at, started + timedelta(seconds=60))
+        self.assertIn('сломалось', task.last_error)
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'WARNING'):
+            self.worker.run(burst=True)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_progress_is_written_to_task_row(self):
+        """Ход выполнения виден в строке задачи, а вне воркера не пишется."""
+        task = reporting.delay('10%')
+        self.worker.run(burst=True)
+        task.refresh_from_db()
+        self.assertEqual(task.progress, 'готово 10%')
+        with self.assertNumQueries(0):
+            reporting('сразу')
+        self.assertEqual(CALLS, ['10%', 'сразу'])
+
+    def test_task_claimed_once(self):
+        record.delay('одна')
+        self.assertEqual(len(tasks.claim(5)), 1)
+        self.assertEqual(tasks.claim(5), [])
+
+    def test_periodic_task_not_duplicated(self):
+        tasks.PERIODIC[record.name] = timedelta(minutes=5)
+        next_runs = {}
+        tasks.enqueue_periodic(next_runs)
+        tasks.enqueue_periodic({})
+        tasks.enqueue_periodic(next_runs)
+        self.assertEqual(Task.objects.filter(name=record.name).count(), 1)
+
+    def test_pool_runs_tasks(self):
+        record.delay('в пуле')
+        worker = tasks.Worker(concurrency=2, poll_interval=5)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            while worker._run_pool(pool):
+                pass
+        self.assertEqual(CALLS, ['в пуле'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            outbox.record('post', outbox.CREATED, i, author=1)
+
+    def test_consume_in_batches_with_checkpoint(self):
+        """Потребитель читает события пачками по порядку и с позиции."""
+        batches = []
+        processed = outbox.consume(
+            'test', lambda events: batches.append(
+                [event.object_id for event in events]),
+            batch_size=2)
+        self.assertEqual(processed, 5)
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+        self.assertEqual(outbox.position('test'),
+                         Event.objects.latest('pk').pk)
+        outbox.record('post', outbox.DELETED, 0)
+        batches.clear()
+        outbox.consume('test', lambda events: batches.append(
+            [(event.object_id, event.action) for event in events]))
+        self.assertEqual(batches, [[(0, outbox.DELETED)]])
+
+    def test_failed_batch_is_read_again(self):
+        def fail(events):
+            raise RuntimeError('потребитель упал')
+
+        with self.assertRaises(RuntimeError):
+            outbox.consume('test', fail)
+        self.assertEqual(outbox.position('test'), 0)
+        self.assertEqual(outbox.consume('test', lambda events: None), 5)
+
+    def test_payload(self):
+        self.assertEqual(outbox.payload(Event.objects.first()),
+                         {'author': 1})
+
+    def test_prune_keeps_unread_events(self):
+        """Старые события удаляются, только когда их прочли все."""
+        Event.objects.update(created=timezone.now() - timedelta(days=30))
+        consumers = {'first': (None, 10), 'second': (None, 10)}
+        with mock.patch.dict(outbox.CONSUMERS, consumers, clear=True):
+            third = Event.objects.order_by('pk')[2].pk
+            Checkpoint.objects.create(consumer='first', position=third)
+            self.assertEqual(outbox.prune(), 0)
+            Checkpoint.objects.create(consumer='second', position=third)
+            self.assertEqual(outbox.prune(), 3)
+        self.assertEqual(Event.objects.count(), 2)
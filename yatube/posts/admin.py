@@ -1,9 +1,57 @@
 from django.contrib import admin
+from django.contrib.auth import admin as auth_admin
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils.functional import cached_property
 
-from .models import Group, Post
+from core import outbox
 
+from . import events, moderation, purge, search
+from .models import Group, Post, Purge
+from .utils import estimated_count
 
-class PostAdmin(admin.ModelAdmin):
+User = get_user_model()
+
+EXACT_COUNT_LIMIT: int = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает всю таблицу без фильтров.
+
+    Точный COUNT(*) делается для отфильтрованного списка и для маленьких
+    таблиц, где он дёшев.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return super().count
+        estimate = estimated_count(queryset)
+        if estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+class OutboxAdminMixin:
+    """Сохранение и удаление в админке пишут событие в outbox."""
+    record_event = None
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            self.record_event(obj,
+                              outbox.UPDATED if change else outbox.CREATED)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            self.record_event(obj, outbox.DELETED)
+            super().delete_model(request, obj)
+
+
+class PostAdmin(OutboxAdminMixin, admin.ModelAdmin):
+    record_event = staticmethod(events.post_changed)
     list_display = (
         'pk',
         'text',
@@ -12,10 +60,95 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    action_form = moderation.ModerationActionForm
+    actions = (
+        moderation.reassign_group_action,
+        moderation.delete_posts_action,
+        moderation.delete_author_posts_action,
+    )
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            events.post_comments_deleted([obj.pk])
+            super().delete_model(request, obj)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление собирает все объекты и каскады в память
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term.split() and search.fts_enabled(
+                connections[queryset.db]):
+            return search.search_posts(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class SoftDeleteMixin:
+    """Удаление скрывает объект и ставит его в очередь очистки.
+
+    Так удаляют и действие списка, и кнопка формы. Страница
+    подтверждения не собирает зависимые объекты: их удалит очистка.
+    Миксин стоит перед OutboxAdminMixin — событие пишет purge.schedule.
+    """
+    actions = (purge.schedule_purge_action,)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        opts = self.model._meta
+        return ([str(obj) for obj in objs],
+                {opts.verbose_name_plural: len(objs)}, set(), [])
+
+    def delete_model(self, request, obj):
+        purge.schedule(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            purge.schedule(obj)
+
+
+class GroupAdmin(SoftDeleteMixin, OutboxAdminMixin, admin.ModelAdmin):
+    record_event = staticmethod(events.group_changed)
+    list_display = (
+        'pk',
+        'title',
+        'slug',
+        'is_active',
+    )
+    list_filter = ('is_active',)
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class UserAdmin(SoftDeleteMixin, OutboxAdminMixin, auth_admin.UserAdmin):
+    record_event = staticmethod(events.user_changed)
+
+
+class PurgeAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'created',
+    )
+    list_filter = ('kind',)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Purge, PurgeAdmin)
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
@@ -0,0 +1,220 @@
+"""JSON API только для чтения: ленты постов и страница поста.
+
+Ленты листаются курсором, а ETag и Last-Modified считаются так же, как
+у HTML-лент: по поколениям лент и последней правке поста. Клиент
+перепроверяет ленту запросом с If-None-Match / If-Modified-Since и
+получает 304 без тела, пока в ней ничего не изменилось — ни новых
+постов, ни правок, ни удалений.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from . import lookups
+from .cache import changed_at, feed
+from .models import Group, Post
+from .utils import cursor_page
+from .views import feed_etag, feed_last_modified, group_missing
+
+User = get_user_model()
+LIMIT: int = 10
+MAX_LIMIT: int = 50
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'author_name': post.author.get_full_name(),
+        'group': (post.group.slug
+                  if post.group_id and post.group.is_active else None),
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': comment.author.username,
+    }
+
+
+def _json(data, status=200):
+    response = JsonResponse(data, status=status,
+                            json_dumps_params={'ensure_ascii': False})
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _error(detail, status):
+    return _json({'detail': detail}, status=status)
+
+
+def _index_feed(request):
+    return Post.objects.visible(), [feed('index')]
+
+
+def _group_feed(request, slug):
+    if group_missing(request, slug):
+        return None
+    return (Post.objects.visible().filter(group__slug=slug),
+            [feed('group', slug)])
+
+
+def _profile_feed(request, username):
+    if lookups.get_author(username) is None:
+        return None
+    return (Post.objects.visible().filter(author__username=username),
+            [feed('profile', username)])
+
+
+def _follow_posts(request):
+    return Post.objects.visible().filter(
+        author__following__user=request.user)
+
+
+def _follow_feed(request):
+    authors = User.objects.filter(following__user=request.user).order_by(
+        'username').values_list('username', flat=True)
+    return (_follow_posts(request),
+            [feed('follow', request.user.pk)]
+            + [feed('profile', username) for username in authors])
+
+
+def conditional_feed(get_feed):
+    """Отвечает 304, пока лента не изменилась.
+
+    get_feed по аргументам view возвращает queryset ленты и список лент
+    из posts.cache, от которых она зависит, или None, если ленты нет —
+    тогда проверки нет и view отвечает 404. Результат запоминается в
+    request, чтобы ETag и Last-Modified не считали его дважды.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_feed_state'):
+            request._feed_state = get_feed(request, *args, **kwargs)
+        return request._feed_state
+
+    def etag(request, *args, **kwargs):
+        found = state(request, *args, **kwargs)
+        if found is None:
+            return None
+        _, feeds = found
+        raw = repr((feeds, feed_etag(*feeds)))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        found = state(request, *args, **kwargs)
+        if found is None:
+            return None
+        posts, feeds = found
+        return feed_last_modified(posts, *feeds)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def login_required_json(view):
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error('Требуется авторизация', 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _feed_response(request, posts):
+    try:
+        limit = int(request.GET.get('limit', LIMIT))
+    except ValueError:
+        return _error('limit должен быть числом', 400)
+    if limit < 1:
+        return _error('limit должен быть положительным', 400)
+    limit = min(limit, MAX_LIMIT)
+    try:
+        batch, next_cursor = cursor_page(
+            posts.select_related('author', 'group'),
+            request.GET.get('cursor'), limit)
+    except ValueError as error:
+        return _error(str(error), 400)
+    return _json({
+        'results': [serialize_post(post) for post in batch],
+        'next': (f'{request.path}?cursor={next_cursor}&limit={limit}'
+                 if next_cursor else None),
+    })
+
+
+@require_safe
+@conditional_feed(_index_feed)
+def index(request):
+    return _feed_response(request, Post.objects.visible())
+
+
+@require_safe
+@conditional_feed(_group_feed)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    return _feed_response(request, group.posts.visible())
+
+
+@require_safe
+@conditional_feed(_profile_feed)
+def profile(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
+    return _feed_response(request, author.posts.visible())
+
+
+@require_safe
+@login_required_json
+@cache_control(private=True, no_cache=True)
+@conditional_feed(_follow_feed)
+def follow_index(request):
+    return _feed_response(request, _follow_posts(request))
+
+
+def _post_state(request, post_id):
+    if not hasattr(request, '_post_state'):
+        posts = Post.objects.visible().filter(pk=post_id)
+        request._post_state = posts.aggregate(
+            updated=Max('updated'),
+            comment_id=Max('comments__pk'),
+            commented=Max('comments__created'))
+    return request._post_state
+
+
+def _post_etag(request, post_id):
+    state = _post_state(request, post_id)
+    if state['updated'] is None:
+        return None
+    raw = repr((post_id, state['updated'], state['comment_id'],
+                feed_etag(feed('post', post_id))))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _post_last_modified(request, post_id):
+    state = _post_state(request, post_id)
+    if state['updated'] is None:
+        return None
+    return max(filter(None, (state['updated'], state['commented'],
+                             changed_at([feed('post', post_id)]))))
+
+
+@require_safe
+@condition(etag_func=_post_etag, last_modified_func=_post_last_modified)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.visible().select_related('author', 'group'),
+        pk=post_id)
+    data = serialize_post(post)
+    data['comments'] = [
+        serialize_comment(comment)
+        for comment in post.comments.visible().select_related('author')
+    ]
+    return _json(data)
@@ -0,0 +1,409 @@
+"""Поколения лент и ключи полностраничного кэша.
+
+У каждой ленты (главная, группа, профиль, страница поста) есть счётчик
+поколения. Ключ закэшированной страницы включает поколения её лент,
+поэтому при изменении контента достаточно увеличить счётчик: старые
+страницы перестают находиться и вытесняются по таймауту.
+
+Все слои кэша в posts (страницы, поколения, lookups) ходят через cache —
+двухуровневый кэш: перед общим бэкендом стоит небольшой LRU в памяти
+процесса, так что самые частые чтения не идут даже в сеть. Дорогие
+значения (страницы лент) пересчитываются через get_or_compute, который
+защищает от «стада» одновременных промахов.
+"""
+import hashlib
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+GENERATION_PREFIX: str = 'feed-gen'
+CHANGED_PREFIX: str = 'feed-changed'
+ALL_FEEDS: str = 'all'
+LOCAL_VERSION_KEY: str = 'local-cache-version'
+LOCAL_JOURNAL_PREFIX: str = 'local-cache-dropped'
+VERSION_CHECK_INTERVAL: float = 1.0
+# Журнал сброшенных ключей: сколько живёт запись и на сколько записей
+# процесс может отстать, прежде чем очистить свой LRU целиком
+JOURNAL_TIMEOUT: int = 60
+JOURNAL_LIMIT: int = 100
+# Защита от стада: сколько секунд устаревшее значение ещё отдаётся, пока
+# его пересчитывают, сколько живёт блокировка пересчёта, сколько ждать
+# чужого пересчёта, если отдать нечего, и насколько рано (BETA)
+# вероятностно обновлять значение до истечения
+STALE_GRACE: int = 60
+LOCK_TIMEOUT: int = 30
+LOCK_WAIT: float = 2.0
+LOCK_POLL: float = 0.05
+EARLY_REFRESH_BETA: float = 1.0
+METRICS_PREFIX: str = 'stampede'
+# Попадания не считаются, чтобы не добавлять запрос к кэшу на каждое.
+# unstored — пересчитавший не сохранил значение, и ждавшие считали сами.
+METRICS = ('miss', 'early', 'rebuilt', 'stale', 'waited', 'unstored',
+           'lock_timeout')
+_MISSING = object()
+
+
+class TwoTierCache:
+    """Общий кэш Django с LRU в памяти процесса перед ним.
+
+    Локальная копия живёт не дольше LOCAL_CACHE_TIMEOUT секунд, а в LRU
+    помещается LOCAL_CACHE_SIZE ключей; ноль отключает локальный уровень.
+    Значения хранятся локально в pickle, поэтому запросы не делят один
+    изменяемый объект, как и с настоящим бэкендом.
+
+    delete и incr пишут изменённые ключи в общий журнал под очередным
+    номером версии. Каждый процесс сверяет версию не чаще раза в
+    VERSION_CHECK_INTERVAL и выбрасывает из LRU только ключи из новых
+    записей журнала, так что инвалидация доходит до всех процессов за
+    секунду, а горячие ключи остаются в памяти. Если записи пропали или
+    процесс отстал больше чем на JOURNAL_LIMIT записей, LRU очищается
+    целиком.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS):
+        self.alias = alias
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = None
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def _enabled(self):
+        return settings.LOCAL_CACHE_SIZE > 0
+
+    def _sync(self):
+        now = time.monotonic()
+        if (self._checked is not None
+                and now - self._checked < VERSION_CHECK_INTERVAL):
+            return
+        self._checked = now
+        version = self.shared.get(LOCAL_VERSION_KEY)
+        if version == self._version:
+            return
+        previous, self._version = self._version, version
+        if (version is None or previous is None
+                or not 0 < version - previous <= JOURNAL_LIMIT):
+            self.clear_local()
+            return
+        journal = self.shared.get_many(
+            [_journal_key(number)
+             for number in range(previous + 1, version + 1)])
+        if len(journal) < version - previous:
+            self.clear_local()
+            return
+        self._local_drop(key for keys in journal.values() for key in keys)
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            expires, data = entry
+            if expires < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+        return pickle.loads(data)
+
+    def _local_put(self, key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = settings.LOCAL_CACHE_TIMEOUT
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, data)
+            self._local.move_to_end(key)
+            while len(self._local) > settings.LOCAL_CACHE_SIZE:
+                self._local.popitem(last=False)
+
+    def _local_drop(self, keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def invalidate_local(self, keys):
+        """Сбрасывает локальные копии keys здесь и в остальных процессах.
+
+        Свою версию процесс не сдвигает: записи журнала, сделанные
+        другими процессами с прошлой сверки, он прочитает при следующей.
+        """
+        if not self._enabled:
+            return
+        keys = list(keys)
+        self._local_drop(keys)
+        try:
+            version = self.shared.incr(LOCAL_VERSION_KEY)
+        except ValueError:
+            version = _initial_generation()
+            self.shared.set(LOCAL_VERSION_KEY, version, None)
+        self.shared.set(_journal_key(version), keys, JOURNAL_TIMEOUT)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def get(self, key, default=None):
+        if not self._enabled:
+            return self.shared.get(key, default)
+        self._sync()
+        value = self._local_get(key)
+        if value is _MISSING:
+            value = self.shared.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._local_put(key, value)
+        return value
+
+    def get_many(self, keys):
+        if not self._enabled:
+            return self.shared.get_many(keys)
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._local_get(key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing)
+            for key, value in fetched.items():
+                self._local_put(key, value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.shared.set(key, value, timeout)
+        if self._enabled:
+            self._sync()
+            self._local_put(key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT):
+        self.shared.set_many(data, timeout)
+        if self._enabled:
+            self._sync()
+            for key, value in data.items():
+                self._local_put(key, value, timeout)
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        self.shared.delete_many(keys)
+        self.invalidate_local(keys)
+
+    def incr(self, key, delta=1):
+        value = self.shared.incr(key, delta)
+        self.invalidate_local([key])
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.clear_local()
+        self._checked = None
+
+    def get_or_compute(self, key, compute, timeout, storable=None):
+        """Значение key; при промахе пересчитывает его один процесс.
+
+        В кэше лежит (значение, свежо до, время пересчёта) и ещё
+        STALE_GRACE секунд после устаревания. Пересчитывает только тот,
+        кто взял короткую блокировку; остальные отдают устаревшее
+        значение, а если его нет — ждут результат до LOCK_WAIT секунд.
+        Незадолго до истечения значение с растущей вероятностью
+        обновляется заранее (XFetch), поэтому популярные ключи обычно
+        вовсе не истекают. storable(значение) решает, кэшировать ли
+        результат compute.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            value, fresh_until, delta = entry
+            if not _refresh_early(fresh_until, delta):
+                return value
+            _count('early' if time.time() < fresh_until else 'miss')
+        else:
+            _count('miss')
+        lock_key = f'lock:{key}'
+        if not self.shared.add(lock_key, 1, LOCK_TIMEOUT):
+            if entry is not None:
+                _count('stale')
+                return entry[0]
+            waited = self._wait_for(key, lock_key)
+            if waited is _MISSING:
+                _count('unstored')
+            elif waited is not None:
+                _count('waited')
+                return waited[0]
+            else:
+                _count('lock_timeout')
+            return compute()
+        try:
+            started = time.time()
+            value = compute()
+            if storable is None or storable(value):
+                finished = time.time()
+                self.set(key, (value, finished + timeout, finished - started),
+                         timeout + STALE_GRACE)
+                _count('rebuilt')
+            return value
+        finally:
+            self.shared.delete(lock_key)
+
+    def update_computed(self, key, change, timeout):
+        """Меняет на месте значение, сохранённое get_or_compute.
+
+        change(значение) правит его под той же блокировкой, что и
+        пересчёт, так что две правки не затирают друг друга. False —
+        блокировку держит кто-то другой и значение осталось прежним;
+        тогда его надёжнее удалить.
+        """
+        lock_key = f'lock:{key}'
+        if not self.shared.add(lock_key, 1, LOCK_TIMEOUT):
+            return False
+        try:
+            entry = self.shared.get(key)
+            if entry is not None:
+                change(entry[0])
+                self.shared.set(key, entry, timeout + STALE_GRACE)
+                self.invalidate_local([key])
+            return True
+        finally:
+            self.shared.delete(lock_key)
+
+    def _wait_for(self, key, lock_key):
+        """Запись key от чужого пересчёта или None, если не дождались.
+
+        Ответ, который нельзя кэшировать (404, редирект, Set-Cookie),
+        снимает блокировку без записи — тогда возвращается _MISSING,
+        чтобы не ждать LOCK_WAIT впустую.
+        """
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            found = self.shared.get_many([key, lock_key])
+            if key in found:
+                return found[key]
+            if lock_key not in found:
+                return _MISSING
+        return None
+
+
+def _journal_key(number):
+    return f'{LOCAL_JOURNAL_PREFIX}:{number}'
+
+
+def _refresh_early(fresh_until, delta, beta=EARLY_REFRESH_BETA):
+    # XFetch: чем дольше пересчёт и ближе истечение, тем вероятнее
+    # обновление; 1 - random() лежит в (0, 1], логарифм отрицателен.
+    return time.time() - delta * beta * math.log(
+        1 - random.random()) >= fresh_until
+
+
+def _count(event):
+    key = f'{METRICS_PREFIX}:{event}'
+    try:
+        cache.shared.incr(key)
+    except ValueError:
+        cache.shared.add(key, 0, None)
+        cache.shared.incr(key)
+
+
+def stampede_metrics():
+    """Счётчики get_or_compute; suppressed — не случившиеся пересчёты."""
+    found = cache.shared.get_many(
+        [f'{METRICS_PREFIX}:{event}' for event in METRICS])
+    metrics = {event: found.get(f'{METRICS_PREFIX}:{event}', 0)
+               for event in METRICS}
+    metrics['suppressed'] = metrics['stale'] + metrics['waited']
+    return metrics
+
+
+cache = TwoTierCache()
+
+
+def feed(kind, value=''):
+    return f'{kind}:{value}'
+
+
+def _generation_key(name):
+    # Слаги и имена пользователей бывают не ASCII, а memcached их не примет.
+    digest = hashlib.md5(str(name).encode()).hexdigest()
+    return f'{GENERATION_PREFIX}:{digest}'
+
+
+def _changed_key(name):
+    digest = hashlib.md5(str(name).encode()).hexdigest()
+    return f'{CHANGED_PREFIX}:{digest}'
+
+
+def _initial_generation():
+    # Счётчик, вытесненный из кэша, начинается заново с текущего времени,
+    # чтобы не совпасть со своими прошлыми значениями.
+    return int(time.time() * 1000)
+
+
+def generations(feeds):
+    """Текущие поколения лент (и общее поколение) одним запросом к кэшу."""
+    names = (ALL_FEEDS,) + tuple(feeds)
+    keys = [_generation_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: _initial_generation() for key in keys
+               if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def changed_at(feeds):
+    """Время последнего bump лент (и общего поколения) или None."""
+    names = (ALL_FEEDS,) + tuple(feeds)
+    found = cache.get_many([_changed_key(name) for name in names])
+    if not found:
+        return None
+    return datetime.fromtimestamp(max(found.values()), timezone.utc)
+
+
+def bump(*feeds):
+    """Инвалидирует страницы перечисленных лент.
+
+    Поколения меняются в общем кэше, рядом запоминается время изменения
+    для Last-Modified, а остальным процессам уходит одна запись журнала
+    на все ленты.
+    """
+    keys = [_generation_key(name) for name in feeds]
+    for key in keys:
+        try:
+            cache.shared.incr(key)
+        except ValueError:
+            cache.shared.set(key, _initial_generation(), None)
+    now = time.time()
+    stamps = {_changed_key(name): now for name in feeds}
+    cache.shared.set_many(stamps, None)
+    cache.invalidate_local(keys + list(stamps))
+
+
+def invalidate_all():
+    """Инвалидирует все страницы, например после массовой загрузки."""
+    bump(ALL_FEEDS)
+
+
+def page_key(path, feeds):
+    """Ключ страницы: путь с query string и поколения её лент."""
+    raw = f'{path}|{generations(feeds)}'
+    return 'page:' + hashlib.md5(raw.encode()).hexdigest()
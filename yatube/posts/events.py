@@ -0,0 +1,44 @@
+"""События outbox об изменениях постов, комментариев, групп и подписок.
+
+Функции вызываются внутри транзакции, в которой меняются данные.
+"""
+from core import outbox
+
+from .models import Comment
+
+
+def post_changed(post, action):
+    return outbox.record('post', action, post.pk, author=post.author_id,
+                         group=post.group_id)
+
+
+def posts_changed(post_ids, action, **payload):
+    return outbox.record_many('post', action, post_ids, **payload)
+
+
+def comment_changed(comment, action):
+    return outbox.record('comment', action, comment.pk,
+                         post=comment.post_id, author=comment.author_id)
+
+
+def post_comments_deleted(post_ids):
+    """События о комментариях, которые удалятся вместе с постами.
+
+    Вызывается до удаления: каскад сам событий не пишет.
+    """
+    comment_ids = list(Comment.objects.filter(post_id__in=post_ids)
+                       .values_list('pk', flat=True))
+    return outbox.record_many('comment', outbox.DELETED, comment_ids)
+
+
+def group_changed(group, action):
+    return outbox.record('group', action, group.pk, slug=group.slug)
+
+
+def follow_changed(follow, action):
+    return outbox.record('follow', action, follow.pk, user=follow.user_id,
+                         author=follow.author_id)
+
+
+def user_changed(user, action):
+    return outbox.record('user', action, user.pk, username=user.username)
@@ -1,8 +1,23 @@
 from django import forms
-from .models import Post, Comment
+from django.core.files.storage import default_storage
+from .models import Comment, Group, Post
+
+IMAGE_KEY_FIELD: str = 'image_key'
+UPLOAD_PREFIX: str = 'posts/uploads'
+
+
+def upload_prefix(user):
+    """Ключи картинок, загруженных пользователем напрямую в хранилище."""
+    return f'{UPLOAD_PREFIX}/{user.pk}/'
 
 
 class PostForm(forms.ModelForm):
+    """Форма поста.
+
+    Картинку можно прислать файлом в поле image или ключом объекта в
+    image_key, если клиент уже загрузил её прямо в хранилище.
+    """
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -16,6 +31,36 @@ class PostForm(forms.ModelForm):
             'image': ('картинка'),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].queryset = Group.objects.filter(is_active=True)
+        self.user = user
+        self.image_key = None
+
+    def clean(self):
+        cleaned_data = super().clean()
+        key = self.data.get(IMAGE_KEY_FIELD)
+        if not key:
+            return cleaned_data
+        if (self.user is None
+                or not key.startswith(upload_prefix(self.user))
+                or '..' in key):
+            self.add_error('image', 'Недопустимый ключ картинки.')
+        elif not default_storage.exists(key):
+            self.add_error('image', 'Картинка не загружена в хранилище.')
+        else:
+            self.image_key = key
+        return cleaned_data
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        if self.image_key:
+            post.image.name = self.image_key
+        if commit:
+            post.save()
+            self._save_m2m()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,74 @@
+"""Порции карточек постов для бесконечной прокрутки лент.
+
+Фрагмент — только карточки следующих LIMIT постов после курсора, без
+base.html, шапки, подвала и навигации. Адрес следующей порции приходит в
+заголовке X-Next. Фрагменты кэшируются отдельно от страниц: в
+полностраничном кэше и у клиента, по тем же правилам, что и ленты.
+"""
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.http import require_safe
+
+from core.http import cache_policy, condition_for_anonymous
+
+from . import lookups
+from .models import Group, Post
+from .utils import cursor_page
+from .views import (FEED_MAX_AGE, LIMIT, group_etag, group_last_modified,
+                    index_etag, index_last_modified, profile_etag,
+                    profile_last_modified)
+
+NEXT_HEADER: str = 'X-Next'
+
+
+def render_fragment(request, posts, show_group=True):
+    try:
+        batch, next_cursor = cursor_page(
+            posts, request.GET.get('cursor'), LIMIT)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = render(request, 'posts/includes/feed_fragment.html', {
+        'posts': lookups.attach_authors(batch),
+        'show_group': show_group,
+    })
+    if next_cursor:
+        response[NEXT_HEADER] = f'{request.path}?cursor={next_cursor}'
+    return response
+
+
+@require_safe
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(index_etag, index_last_modified)
+def index(request):
+    return render_fragment(
+        request,
+        Post.objects.visible().select_related('group').defer('text'))
+
+
+@require_safe
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(group_etag, group_last_modified)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    return render_fragment(
+        request, group.posts.visible().defer('text'),
+        show_group=False)
+
+
+@require_safe
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(profile_etag, profile_last_modified)
+def profile(request, username):
+    author = lookups.get_author_or_404(username)
+    return render_fragment(
+        request, Post.objects.visible().filter(
+            author_id=author.pk).select_related('group').defer('text'))
+
+
+@require_safe
+@login_required
+def follow_index(request):
+    return render_fragment(request, Post.objects.visible().filter(
+        author__following__user=request.user
+    ).select_related('group').defer('text'))
@@ -0,0 +1,173 @@
+"""Дешёвые 404 для несуществующих постов и авторов.
+
+Боты перебирают случайные /posts/<id>/ и /profile/<username>/. Чтобы
+такие запросы не доходили до базы, в кэше хранятся:
+
+  - наибольший id поста: id больше него точно не существует;
+  - фильтр Блума имён пользователей: имя не из фильтра точно не занято;
+  - отрицательные записи: уже проверенные по базе отсутствующие посты и
+    авторы, на NEGATIVE_TIMEOUT секунд.
+
+Там же лежат краткие записи пользователей — объекты User только с полями
+SUMMARY_FIELDS: профиль, подписки и ленты берут автора из кэша, а не из
+базы. Обращение к другим полям догрузит их обычным запросом.
+
+Ключи включают общее поколение кэша лент, поэтому invalidate_all после
+массовой загрузки или скрытия пользователя сбрасывает и их. Создание
+поста и сохранение пользователя сбрасывают нужные ключи через сигналы.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.http import Http404
+
+from core.bloom import BloomFilter
+
+from .cache import cache, generations
+from .models import Post
+
+User = get_user_model()
+NEGATIVE_TIMEOUT: int = 60 * 5
+FILTER_TIMEOUT: int = 60 * 60
+SUMMARY_TIMEOUT: int = 60 * 60
+MAX_POST_ID: str = 'max-post-id'
+USERNAMES: str = 'usernames'
+SUMMARY_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def _key(name, generation=None):
+    if generation is None:
+        generation, = generations(())
+    return f'lookup:{generation}:{name}'
+
+
+def _summary_id_key(user_id, generation=None):
+    return _key(f'user:{user_id}', generation)
+
+
+def _summary_name_key(username, generation=None):
+    return _key(f'username:{username.encode().hex()}', generation)
+
+
+def _missing_post_key(post_id):
+    return _key(f'missing-post:{post_id}')
+
+
+def _missing_author_key(username):
+    return _key(f'missing-author:{username.encode().hex()}')
+
+
+def max_post_id():
+    key = _key(MAX_POST_ID)
+    value = cache.get(key)
+    if value is None:
+        value = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        cache.set(key, value, FILTER_TIMEOUT)
+    return value
+
+
+def _build_username_filter():
+    usernames = User.objects.values_list('username', flat=True)
+    return BloomFilter.from_iterable(
+        usernames.iterator(), capacity=usernames.count())
+
+
+def username_filter():
+    """Фильтр имён; пересобирает его один запрос, а не каждый промах."""
+    return cache.get_or_compute(
+        _key(USERNAMES), _build_username_filter, FILTER_TIMEOUT)
+
+
+def post_missing(post_id):
+    """True, если поста точно нет; False — нужно проверить по базе."""
+    return (post_id > max_post_id()
+            or cache.get(_missing_post_key(post_id)) is not None)
+
+
+def author_missing(username):
+    """True, если автора точно нет; False — нужно проверить по базе."""
+    return (username not in username_filter()
+            or cache.get(_missing_author_key(username)) is not None)
+
+
+def get_author(username):
+    """Краткая запись активного пользователя по имени или None."""
+    key = _summary_name_key(username)
+    summary = cache.get(key)
+    if summary is None:
+        summary = User.objects.only(*SUMMARY_FIELDS).filter(
+            username=username, is_active=True).first()
+        if summary is None:
+            return None
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
+
+
+def get_authors(user_ids):
+    """Краткие записи пользователей по id.
+
+    Одно обращение к кэшу и не больше одного запроса к базе за
+    недостающими записями.
+    """
+    generation, = generations(())
+    keys = {_summary_id_key(pk, generation): pk for pk in set(user_ids)}
+    found = cache.get_many(keys)
+    summaries = {keys[key]: summary for key, summary in found.items()}
+    missing = [pk for key, pk in keys.items() if key not in found]
+    if missing:
+        fetched = User.objects.only(*SUMMARY_FIELDS).in_bulk(missing)
+        cache.set_many({_summary_id_key(pk, generation): summary
+                        for pk, summary in fetched.items()},
+                       SUMMARY_TIMEOUT)
+        summaries.update(fetched)
+    return summaries
+
+
+def attach_authors(posts):
+    """Подставляет постам авторов из кэша вместо JOIN с пользователями."""
+    posts = list(posts)
+    authors = get_authors(post.author_id for post in posts)
+    for post in posts:
+        Post.author.field.set_cached_value(post, authors[post.author_id])
+    return posts
+
+
+def get_post_or_404(queryset, post_id):
+    if post_missing(post_id):
+        raise Http404('Пост не найден')
+    try:
+        return queryset.get(pk=post_id)
+    except Post.DoesNotExist:
+        cache.set(_missing_post_key(post_id), True, NEGATIVE_TIMEOUT)
+        raise Http404('Пост не найден')
+
+
+def get_author_or_404(username):
+    """Краткая запись активного автора или Http404."""
+    if author_missing(username):
+        raise Http404('Автор не найден')
+    summary = get_author(username)
+    if summary is None:
+        cache.set(_missing_author_key(username), True, NEGATIVE_TIMEOUT)
+        raise Http404('Автор не найден')
+    return summary
+
+
+def forget_post(post_id):
+    """Сбрасывает отрицательные записи после создания поста."""
+    cache.delete_many([_key(MAX_POST_ID), _missing_post_key(post_id)])
+
+
+def forget_author(user, previous_username=None):
+    """Сбрасывает кэш пользователя после его сохранения или удаления."""
+    username = user.username
+    keys = [_missing_author_key(username), _summary_id_key(user.pk),
+            _summary_name_key(username)]
+    if previous_username and previous_username != username:
+        keys.append(_summary_name_key(previous_username))
+    # Новое имя дописывается в фильтр: пересборка читает всех
+    # пользователей, а каждая регистрация сбрасывала бы его.
+    if not cache.update_computed(_key(USERNAMES),
+                                 lambda bloom: bloom.add(username),
+                                 FILTER_TIMEOUT):
+        keys.append(_key(USERNAMES))
+    cache.delete_many(keys)
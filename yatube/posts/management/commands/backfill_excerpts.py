@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import records
+from posts.cache import invalidate_all
+from posts.models import Post
+from posts.moderation import chunked_ids
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает начала текстов постов порциями, например '
+            'после изменения EXCERPT_LENGTH.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все посты, а не только с пустым началом.')
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между порциями, секунд: даёт записать другим.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all()
+        if not options['all']:
+            posts = posts.filter(excerpt='').exclude(text='')
+        updated = 0
+        for ids in chunked_ids(posts):
+            batch = list(Post.objects.filter(pk__in=ids).only('pk', 'text'))
+            for post in batch:
+                post.fill_excerpt()
+            with transaction.atomic():
+                Post.objects.bulk_update(batch,
+                                         ['excerpt', 'excerpt_truncated'])
+            records.forget(ids)
+            updated += len(batch)
+            if options['pause']:
+                time.sleep(options['pause'])
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено постов: {updated}'))
@@ -0,0 +1,89 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group
+
+User = get_user_model()
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+LOCAL_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench-feeds',
+    },
+}
+
+
+def _templates(cached):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = settings.TEMPLATE_LOADERS
+    templates[0]['OPTIONS']['loaders'] = (
+        [('django.template.loaders.cached.Loader', loaders)]
+        if cached else loaders)
+    return templates
+
+
+PROFILES = (
+    ('до', {'TEMPLATES': _templates(False), 'CACHES': DUMMY_CACHES}),
+    ('после', {'TEMPLATES': _templates(True), 'CACHES': LOCAL_CACHES}),
+)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время отрисовки первой страницы каждой ленты '
+            'без кэшей шаблонов и с ними. Данные готовит команда seed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page', type=int, default=1)
+
+    def handle(self, *args, **options):
+        group = Group.objects.annotate(total=Count('posts')).order_by(
+            '-total').first()
+        author = User.objects.annotate(total=Count('posts')).order_by(
+            '-total').first()
+        reader = User.objects.annotate(total=Count('follower')).order_by(
+            '-total').first()
+        if group is None or author is None:
+            raise CommandError('База пуста, сначала выполните seed.')
+        query = f'?page={options["page"]}'
+        feeds = (
+            ('index', reverse('posts:index') + query),
+            ('group_list',
+             reverse('posts:group_list', args=[group.slug]) + query),
+            ('profile',
+             reverse('posts:profile', args=[author.username]) + query),
+            ('follow', reverse('posts:follow_index') + query),
+        )
+        results = {}
+        for profile, overrides in PROFILES:
+            with override_settings(PAGE_CACHE_TIMEOUT=0, **overrides):
+                client = Client()
+                client.force_login(reader)
+                for name, url in feeds:
+                    results[name, profile] = self.measure(
+                        client, url, options['repeat'])
+        self.stdout.write(f'{"лента":<12}{"до, мс":>10}{"после, мс":>12}')
+        for name, url in feeds:
+            before, after = results[name, 'до'], results[name, 'после']
+            self.stdout.write(
+                f'{name:<12}{before:>10.1f}{after:>12.1f}'
+                f'   x{before / after:.1f}')
+
+    def measure(self, client, url, repeat):
+        """Среднее время ответа в миллисекундах после прогревочного запроса."""
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        return (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import stampede_metrics
+
+
+class Command(BaseCommand):
+    help = 'Показывает счётчики пересчётов полностраничного кэша.'
+
+    def handle(self, *args, **options):
+        for event, count in stampede_metrics().items():
+            self.stdout.write(f'{event}: {count}')
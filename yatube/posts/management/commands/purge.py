@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.purge import purge_pending
+
+
+class Command(BaseCommand):
+    help = 'Удаляет по частям пользователей и группы из очереди очистки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между порциями, секунд: даёт записать другим.')
+
+    def handle(self, *args, **options):
+        purged = purge_pending(pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Очищено объектов: {purged}'))
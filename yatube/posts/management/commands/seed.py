@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу пользователями, группами, постами и подписками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Сколько авторов выбирает каждый пользователь.')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Процессов для генерации текста Faker\'ом.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного распределения популярности.')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            random_seed=options['seed'],
+            alpha=options['alpha'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с: {created}'))
@@ -0,0 +1,22 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.stream import Streamer
+
+
+class Command(BaseCommand):
+    help = 'Отдаёт поток Server-Sent Events о новых постах и комментариях.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.STREAM_HOST)
+        parser.add_argument('--port', type=int, default=settings.STREAM_PORT)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Поток слушает {options["host"]}:{options["port"]}')
+        try:
+            asyncio.run(Streamer().serve(options['host'], options['port']))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import cache as page_cache
+
+CACHED_VIEWS = {
+    'posts:index': lambda kwargs: [page_cache.feed('index')],
+    'posts:group_list': lambda kwargs: [
+        page_cache.feed('group', kwargs['slug'])],
+    'posts:profile': lambda kwargs: [
+        page_cache.feed('profile', kwargs['username'])],
+    'posts:fragment_index': lambda kwargs: [page_cache.feed('index')],
+    'posts:fragment_group_list': lambda kwargs: [
+        page_cache.feed('group', kwargs['slug'])],
+    'posts:fragment_profile': lambda kwargs: [
+        page_cache.feed('profile', kwargs['username'])],
+    'posts:post_detail': lambda kwargs: [
+        page_cache.feed('post', kwargs['post_id'])],
+}
+
+
+class AnonymousPageCacheMiddleware:
+    """Полностраничный кэш лент и постов для анонимных читателей.
+
+    Стоит перед SessionMiddleware: запрос без cookie сессии обслуживается
+    из кэша без сессии, шаблонов, контекст-процессоров и запросов к базе.
+    Запросы с сессией всегда проходят дальше. Таймаут задаётся
+    PAGE_CACHE_TIMEOUT, ноль отключает кэш. Истёкшую страницу
+    пересобирает один воркер, остальные тем временем отдают старую.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self._cache_key(request)
+        if key is None:
+            return self.get_response(request)
+        response = page_cache.cache.get_or_compute(
+            key,
+            lambda: self.get_response(request),
+            settings.PAGE_CACHE_TIMEOUT,
+            storable=lambda response: self._storable(request, response),
+        )
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')),
+            response=response,
+        )
+
+    def _cache_key(self, request):
+        if not settings.PAGE_CACHE_TIMEOUT:
+            return None
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        feeds = CACHED_VIEWS.get(match.view_name)
+        if feeds is None:
+            return None
+        return page_cache.page_key(request.get_full_path(),
+                                   feeds(match.kwargs))
+
+    def _storable(self, request, response):
+        return (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Purge',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=10, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Идентификатор')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='Снимается при удалении: группа скрыта до очистки', verbose_name='Активна'),
+        ),
+        migrations.AddConstraint(
+            model_name='purge',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique purge'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+from posts import search
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    # Копия posts.utils.make_excerpt на момент миграции: её правки не
+    # должны менять то, что делает уже написанная миграция.
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('pk', 'text').order_by('pk')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        post.excerpt = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt'])
+
+
+def install_search(apps, schema_editor):
+    # SQLite пересоздал posts_post при добавлении поля и потерял триггеры
+    search.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_purge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(default='', editable=False, help_text='Показывается в лентах; считается при сохранении', verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
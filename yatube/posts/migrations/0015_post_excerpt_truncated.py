@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+from posts import search
+
+
+def fill_excerpt_truncated(apps, schema_editor):
+    # Обрезанное начало текста всегда отличается от самого текста
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(excerpt=models.F('text')).update(
+        excerpt_truncated=True)
+
+
+def install_search(apps, schema_editor):
+    # SQLite пересоздал posts_post при добавлении поля и потерял триггеры
+    search.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, help_text='Лента показывает ссылку «читать дальше»', verbose_name='Текст обрезан'),
+        ),
+        migrations.RunPython(fill_excerpt_truncated,
+                             migrations.RunPython.noop),
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .utils import make_excerpt
+
 User = get_user_model()
 LIMIT_POST: int = 15
 LIMIT_COMMENT: int = 250
@@ -17,17 +19,57 @@ class Group(models.Model):
         unique=True)
     description = models.TextField(
         verbose_name='Описание группы')
+    is_active = models.BooleanField(
+        verbose_name='Активна',
+        default=True,
+        help_text='Снимается при удалении: группа скрыта до очистки')
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не вызывает save, поэтому начало текста считается тут
+        objs = list(objs)
+        for post in objs:
+            post.fill_excerpt()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def visible(self):
+        """Посты без скрытых авторов, ожидающих удаления.
+
+        Посты скрытой группы остаются на сайте, как после её удаления;
+        скрывается только сама группа — её страница и ссылки на неё.
+        """
+        return self.filter(author__is_active=True)
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        """Комментарии без скрытых авторов, ожидающих удаления."""
+        return self.filter(author__is_active=True)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Расскажите о чём-то интересном')
+    excerpt = models.TextField(
+        verbose_name='Начало текста',
+        default='',
+        editable=False,
+        help_text='Показывается в лентах; считается при сохранении')
+    excerpt_truncated = models.BooleanField(
+        verbose_name='Текст обрезан',
+        default=False,
+        editable=False,
+        help_text='Лента показывает ссылку «читать дальше»')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     db_index=True)
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -47,11 +89,28 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True)
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[: LIMIT_POST]
 
+    def fill_excerpt(self):
+        self.excerpt = make_excerpt(self.text)
+        self.excerpt_truncated = self.excerpt != self.text
+
+    def save(self, *args, **kwargs):
+        self.fill_excerpt()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'excerpt',
+                                       'excerpt_truncated'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-updated'], name='post_updated_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -68,6 +127,8 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments')
 
+    objects = CommentQuerySet.as_manager()
+
     def __str__(self):
         return self.text[: LIMIT_COMMENT]
 
@@ -92,3 +153,30 @@ class Follow(models.Model):
                 name='unique subs'
             )
         ]
+
+
+class Purge(models.Model):
+    """Пользователь или группа, скрытые и ожидающие удаления по частям."""
+    USER = 'user'
+    GROUP = 'group'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField(
+        verbose_name='Тип',
+        max_length=10,
+        choices=KINDS)
+    object_id = models.PositiveIntegerField(
+        verbose_name='Идентификатор')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='unique purge'
+            )
+        ]
@@ -0,0 +1,234 @@
+"""Массовые действия модераторов над постами.
+
+Посты обрабатываются порциями по первичному ключу: каждая порция — один
+UPDATE или DELETE в своей транзакции, так что ни память, ни время
+блокировки базы не растут с размером выборки. Большие выборки
+обрабатываются задачей в очереди, а ход работы пишется в журнал и в
+строку задачи, которую модератор видит в админке. В
+задачу попадает не список ключей, а описание выборки: отмеченные посты,
+авторы или фильтры и поиск списка в админке. Воркер строит по нему
+queryset и обходит его теми же порциями.
+"""
+import logging
+
+from django import forms
+from django.contrib import messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME, ActionForm
+from django.contrib.admin.views.main import (ERROR_FLAG, IGNORED_PARAMS,
+                                             PAGE_VAR, SEARCH_VAR)
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from core import outbox
+from core.tasks import report_progress, task
+
+from . import events, records, search
+from .cache import invalidate_all
+from .models import Comment, Group, Post
+from .utils import estimated_count
+
+logger = logging.getLogger(__name__)
+CHUNK_SIZE: int = 500
+BACKGROUND_THRESHOLD: int = 5000
+
+
+def chunked_ids(queryset, chunk_size=None):
+    """Первичные ключи queryset порциями по возрастанию.
+
+    Следующая порция ищется от последнего ключа предыдущей, а не
+    смещением, поэтому удаление уже обработанных строк ей не мешает.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _chunks(selection):
+    if isinstance(selection, QuerySet):
+        return chunked_ids(selection)
+    return (selection[start:start + CHUNK_SIZE]
+            for start in range(0, len(selection), CHUNK_SIZE))
+
+
+def _process(selection, apply, progress=None):
+    """Применяет apply к порциям выборки: queryset или списка ключей."""
+    done = 0
+    for ids in _chunks(selection):
+        with transaction.atomic():
+            done += apply(ids)
+        if progress:
+            progress(done)
+    invalidate_all()
+    return done
+
+
+def reassign_group(selection, group_id, progress=None):
+    """Переносит посты в группу group_id (None — убирает из группы)."""
+    def apply(ids):
+        events.posts_changed(ids, outbox.UPDATED, group=group_id)
+        changed = Post.objects.filter(pk__in=ids).update(
+            group_id=group_id, updated=timezone.now())
+        records.forget(ids)
+        return changed
+    return _process(selection, apply, progress)
+
+
+def delete_posts(selection, progress=None):
+    """Удаляет посты вместе с комментариями, без сбора объектов в память.
+
+    Сигналы моделей не отправляются, кэш страниц сбрасывается целиком
+    в конце.
+    """
+    def apply(ids):
+        events.posts_changed(ids, outbox.DELETED)
+        events.post_comments_deleted(ids)
+        Comment.objects.filter(post_id__in=ids)._raw_delete(
+            Comment.objects.db)
+        deleted = Post.objects.filter(pk__in=ids)._raw_delete(Post.objects.db)
+        records.forget(ids)
+        return deleted
+    return _process(selection, apply, progress)
+
+
+def author_ids(queryset):
+    """Авторы постов queryset."""
+    return sorted(queryset.order_by().values_list('author_id', flat=True)
+                  .distinct())
+
+
+def changelist_selection(request):
+    """Описание выборки действия в списке постов для задачи в очереди.
+
+    Отмеченные посты передаются ключами: их не больше страницы списка.
+    «Выбрать все» передаёт фильтры и поиск из адреса списка, а last —
+    последний пост на момент действия, чтобы новые посты не попали в
+    выборку.
+    """
+    if request.POST.get('select_across') != '1':
+        return {'pks': [int(pk) for pk
+                        in request.POST.getlist(ACTION_CHECKBOX_NAME)]}
+    filters = request.GET.dict()
+    term = filters.pop(SEARCH_VAR, '')
+    for name in IGNORED_PARAMS + (PAGE_VAR, ERROR_FLAG):
+        filters.pop(name, None)
+    last = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return {'filters': filters, 'search': term, 'last': last or 0}
+
+
+def select_posts(selection):
+    """Queryset постов по описанию выборки из changelist_selection.
+
+    Поиск повторяет поиск админки: FTS5, если он есть, иначе LIKE по
+    каждому слову.
+    """
+    if 'pks' in selection:
+        return Post.objects.filter(pk__in=selection['pks'])
+    if 'authors' in selection:
+        return Post.objects.filter(author_id__in=selection['authors'])
+    posts = Post.objects.filter(pk__lte=selection['last'],
+                                **selection['filters'])
+    term = selection['search']
+    if term.split() and search.fts_enabled():
+        return search.search_posts(posts, term)
+    for word in term.split():
+        posts = posts.filter(text__icontains=word)
+    return posts
+
+
+def _progress(title, total):
+    def report(done):
+        logger.info('%s: %d из %d', title, done, total)
+        report_progress(f'{title}: {done} из {total}')
+    return report
+
+
+def _selection_size(queryset):
+    """Размер выборки без COUNT(*) по всей таблице, как в списке админки.
+
+    Для выбора между запросом и фоном хватает оценки; точное число
+    посчитает воркер.
+    """
+    if queryset.query.where:
+        return queryset.count()
+    return estimated_count(queryset)
+
+
+JOBS = {job.__name__: job for job in (reassign_group, delete_posts)}
+
+
+@task(priority=-1)
+def moderate(job_name, title, selection, *args):
+    """Массовое действие над большой выборкой в воркере очереди."""
+    posts = select_posts(selection)
+    progress = _progress(title, posts.count())
+    progress(0)
+    JOBS[job_name](posts, *args, progress=progress)
+
+
+def _run(modeladmin, request, queryset, title, job, *args, selection=None):
+    size = _selection_size(queryset)
+    if size > BACKGROUND_THRESHOLD:
+        if selection is None:
+            selection = changelist_selection(request)
+        queued = moderate.delay(job.__name__, title, selection, *args)
+        modeladmin.message_user(
+            request, f'{title}: посты обрабатываются в фоне, ход виден '
+            f'в задаче #{queued.pk}.', messages.INFO)
+    else:
+        done = job(queryset, *args, _progress(title, size))
+        modeladmin.message_user(
+            request, f'{title}: обработано постов — {done}.',
+            messages.SUCCESS)
+
+
+class ModerationActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        empty_label='без группы',
+        label='Группа')
+
+
+def reassign_group_action(modeladmin, request, queryset):
+    # Поле action формы проверяет сама админка, здесь нужна только группа
+    field = ModerationActionForm().fields['group']
+    try:
+        group = field.clean(request.POST.get('group'))
+    except ValidationError:
+        modeladmin.message_user(request, 'Выберите существующую группу.',
+                                messages.ERROR)
+        return
+    _run(modeladmin, request, queryset, 'Перенос в группу', reassign_group,
+         group.pk if group else None)
+
+
+reassign_group_action.short_description = 'Перенести в выбранную группу'
+reassign_group_action.allowed_permissions = ('change',)
+
+
+def delete_posts_action(modeladmin, request, queryset):
+    _run(modeladmin, request, queryset, 'Удаление', delete_posts)
+
+
+delete_posts_action.short_description = 'Удалить выбранные посты'
+delete_posts_action.allowed_permissions = ('delete',)
+
+
+def delete_author_posts_action(modeladmin, request, queryset):
+    authors = author_ids(queryset)
+    _run(modeladmin, request, select_posts({'authors': authors}),
+         'Удаление постов авторов', delete_posts,
+         selection={'authors': authors})
+
+
+delete_author_posts_action.short_description = (
+    'Удалить все посты авторов выбранных постов')
+delete_author_posts_action.allowed_permissions = ('delete',)
@@ -0,0 +1,131 @@
+"""Мягкое удаление пользователей и групп с последующей очисткой.
+
+Удаление автора каскадом стирает его посты, комментарии и подписки, а
+удаление группы обнуляет группу у всех её постов — одной транзакцией,
+которая держит блокировку SQLite всё это время. Поэтому удаление идёт в
+два шага: schedule сразу скрывает объект (is_active=False) и ставит его
+в очередь, а purge_pending позже удаляет зависимые строки порциями, по
+транзакции на порцию, и только потом саму запись.
+"""
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from core import outbox
+from users import auth as users_auth
+
+from . import events, records
+from .cache import invalidate_all
+from .moderation import chunked_ids
+from .models import Comment, Follow, Group, Post, Purge
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def schedule(obj):
+    """Скрывает пользователя или группу и ставит их в очередь очистки."""
+    is_group = isinstance(obj, Group)
+    kind = Purge.GROUP if is_group else Purge.USER
+    with transaction.atomic():
+        type(obj).objects.filter(pk=obj.pk).update(is_active=False)
+        Purge.objects.get_or_create(kind=kind, object_id=obj.pk)
+        record = events.group_changed if is_group else events.user_changed
+        record(obj, outbox.DELETED)
+    obj.is_active = False
+    if is_group:
+        # Записи постов группы ссылаются на неё, а ссылка больше не нужна
+        for ids in chunked_ids(obj.posts.all()):
+            records.forget(ids)
+    else:
+        # Админка удаляет внутри своей транзакции
+        users_auth.forget(obj.pk)
+        transaction.on_commit(lambda: users_auth.forget(obj.pk))
+    invalidate_all()
+
+
+def _in_chunks(queryset, apply, pause):
+    done = 0
+    for ids in chunked_ids(queryset):
+        with transaction.atomic():
+            done += apply(ids)
+        if pause:
+            time.sleep(pause)
+    return done
+
+
+def _delete(model, topic):
+    def apply(ids):
+        outbox.record_many(topic, outbox.DELETED, ids)
+        deleted = model.objects.filter(pk__in=ids)._raw_delete(
+            model.objects.db)
+        if model is Post:
+            records.forget(ids)
+        return deleted
+    return apply
+
+
+def purge_user(user_id, pause=0):
+    posts = Post.objects.filter(author_id=user_id)
+    _in_chunks(Comment.objects.filter(Q(author_id=user_id)
+                                      | Q(post__author_id=user_id)),
+               _delete(Comment, 'comment'), pause)
+    removed = _in_chunks(posts, _delete(Post, 'post'), pause)
+    _in_chunks(Follow.objects.filter(Q(user_id=user_id)
+                                     | Q(author_id=user_id)),
+               _delete(Follow, 'follow'), pause)
+    # Тяжёлые каскады уже разобраны, осталось немного служебных строк
+    User.objects.filter(pk=user_id).delete()
+    return removed
+
+
+def purge_group(group_id, pause=0):
+    def apply(ids):
+        events.posts_changed(ids, outbox.UPDATED, group=None)
+        moved = Post.objects.filter(pk__in=ids).update(group_id=None)
+        records.forget(ids)
+        return moved
+    moved = _in_chunks(Post.objects.filter(group_id=group_id), apply, pause)
+    Group.objects.filter(pk=group_id).delete()
+    return moved
+
+
+def purge_pending(pause=0):
+    """Очищает всю очередь; pause — пауза между порциями в секундах.
+
+    Запись очереди удаляется последней, так что прерванная очистка
+    продолжится при следующем запуске. Если объект успели снова
+    сделать активным, удаление отменяется.
+    """
+    purged = 0
+    for entry in Purge.objects.all():
+        model = User if entry.kind == Purge.USER else Group
+        if not model.objects.filter(pk=entry.object_id,
+                                    is_active=False).exists():
+            entry.delete()
+            continue
+        if entry.kind == Purge.USER:
+            rows = purge_user(entry.object_id, pause)
+        else:
+            rows = purge_group(entry.object_id, pause)
+        logger.info('Очищено: %s %s, постов — %d', entry.get_kind_display(),
+                    entry.object_id, rows)
+        entry.delete()
+        purged += 1
+    if purged:
+        invalidate_all()
+    return purged
+
+
+def schedule_purge_action(modeladmin, request, queryset):
+    for obj in queryset:
+        schedule(obj)
+    modeladmin.message_user(
+        request, f'Скрыто и поставлено в очередь удаления: {len(queryset)}.')
+
+
+schedule_purge_action.short_description = 'Удалить в фоне'
+schedule_purge_action.allowed_permissions = ('delete',)
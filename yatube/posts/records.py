@@ -0,0 +1,167 @@
+"""Компактные записи постов для кэшей лент.
+
+В кэш кладётся не pickle модели Post со _state, кэшами связей и всем
+текстом, а плоский кортеж ровно из того, что рисует карточка в ленте:
+id, начало текста, даты, автор, группа и имя файла картинки. Первый элемент —
+версия формата: записи старой версии после выкладки просто не
+читаются. PostRecord из такого кортежа ведёт себя в шаблонах как Post.
+"""
+from .cache import cache
+
+RECORD_VERSION: int = 3
+RECORD_TIMEOUT: int = 60 * 60 * 24
+
+
+class AuthorRecord:
+    __slots__ = ('pk', 'username', 'full_name')
+
+    def __init__(self, pk, username, full_name):
+        self.pk = pk
+        self.username = username
+        self.full_name = full_name
+
+    @property
+    def id(self):
+        return self.pk
+
+    def get_full_name(self):
+        return self.full_name
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        return _same_pk(self, other, 'auth.user')
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class GroupRecord:
+    __slots__ = ('pk', 'slug', 'title')
+    # В записи попадают только активные группы
+    is_active = True
+
+    def __init__(self, pk, slug, title):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __str__(self):
+        return self.title
+
+    def __eq__(self, other):
+        return _same_pk(self, other, 'posts.group')
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class PostRecord:
+    """Пост в ленте: те же атрибуты, что читает карточка у Post.
+
+    Равен Post с тем же pk, поэтому код и тесты, сравнивающие посты
+    страницы с моделями, работают без изменений.
+    """
+    __slots__ = ('pk', 'excerpt', 'excerpt_truncated', 'pub_date',
+                 'updated', 'author', 'group', 'image')
+
+    def __init__(self, pk, excerpt, excerpt_truncated, pub_date, updated,
+                 author, group, image):
+        self.pk = pk
+        self.excerpt = excerpt
+        self.excerpt_truncated = excerpt_truncated
+        self.pub_date = pub_date
+        self.updated = updated
+        self.author = author
+        self.group = group
+        self.image = image
+
+    @property
+    def id(self):
+        return self.pk
+
+    @property
+    def author_id(self):
+        return self.author.pk
+
+    @property
+    def group_id(self):
+        return self.group.pk if self.group else None
+
+    def __repr__(self):
+        return f'<PostRecord: {self.pk}>'
+
+    def __eq__(self, other):
+        return _same_pk(self, other, 'posts.post')
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+def _same_pk(record, other, label):
+    if isinstance(other, type(record)):
+        return record.pk == other.pk
+    meta = getattr(other, '_meta', None)
+    if meta is not None and meta.label_lower == label:
+        return record.pk == other.pk
+    return NotImplemented
+
+
+def encode(post):
+    """Кортеж записи; у post должны быть загружены author и group."""
+    group = post.group if post.group_id and post.group.is_active else None
+    return (
+        RECORD_VERSION, post.pk, post.excerpt, post.excerpt_truncated,
+        post.pub_date, post.updated,
+        post.author.pk, post.author.username, post.author.get_full_name(),
+        group.pk if group else None, group.slug if group else None,
+        group.title if group else None, post.image.name or '',
+    )
+
+
+def decode(data):
+    """PostRecord из кортежа или None для записи другой версии."""
+    if not data or data[0] != RECORD_VERSION:
+        return None
+    (_, pk, excerpt, excerpt_truncated, pub_date, updated, author_id,
+     username, full_name, group_id, group_slug, group_title, image) = data
+    group = (GroupRecord(group_id, group_slug, group_title)
+             if group_id else None)
+    return PostRecord(pk, excerpt, excerpt_truncated, pub_date, updated,
+                      AuthorRecord(author_id, username, full_name),
+                      group, image)
+
+
+def _key(post_id):
+    return f'post-record:{RECORD_VERSION}:{post_id}'
+
+
+def get_records(ids, posts):
+    """Записи постов по id: из кэша, недостающие — одним in_bulk.
+
+    posts — queryset ленты, он же отсекает скрытые посты при промахе.
+    Возвращает словарь id -> PostRecord без ненайденных id.
+    """
+    keys = {_key(pk): pk for pk in ids}
+    records = {}
+    for key, data in cache.get_many(keys).items():
+        record = decode(data)
+        if record is not None:
+            records[keys[key]] = record
+    missing = [pk for pk in keys.values() if pk not in records]
+    if missing:
+        found = posts.select_related('author', 'group').in_bulk(missing)
+        encoded = {pk: encode(post) for pk, post in found.items()}
+        cache.set_many({_key(pk): data for pk, data in encoded.items()},
+                       RECORD_TIMEOUT)
+        records.update((pk, decode(data)) for pk, data in encoded.items())
+    return records
+
+
+def forget(post_ids):
+    cache.delete_many([_key(pk) for pk in post_ids])
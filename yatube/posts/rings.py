@@ -0,0 +1,113 @@
+"""Кольца id свежих постов для первых страниц лент.
+
+Первые страницы главной, групп и профилей запрашивают чаще всего. Для
+каждой такой ленты в общем кэше лежит список RING_SIZE самых новых id в
+порядке ленты. Страница, попавшая в кольцо, собирается из среза id и
+компактных записей постов (posts.records) из кэша, а недостающие
+записи — одним in_bulk по первичному ключу вместо запроса с сортировкой
+по pub_date.
+
+Новый пост дописывается в начало колец своих лент (и ещё раз после
+фиксации транзакции, если кольцо успели пересобрать без него), удалённый
+— убирается из них, а смена группы сбрасывает кольцо новой группы.
+Кольцо меняется под короткой блокировкой; не взявший её процесс просто
+сбрасывает кольцо, и оно пересобирается при следующем чтении. Ключи
+включают общее поколение кэша, поэтому invalidate_all (массовая
+загрузка, скрытие автора или группы) сбрасывает и кольца.
+
+Кольца читаются из общего кэша в обход локального LRU: сразу после
+нового поста все процессы должны видеть его в кольце, иначе пересобранная
+по новому поколению страница закэшируется без него.
+"""
+import hashlib
+
+from . import records
+from .cache import cache, feed, generations
+
+RING_SIZE: int = 300
+RING_TIMEOUT: int = 60 * 60
+LOCK_TIMEOUT: int = 5
+
+
+def _key(name):
+    generation, = generations(())
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f'ring:{generation}:{digest}'
+
+
+def post_feeds(post, group_slug=None):
+    """Ленты с кольцами, в которые попадает пост."""
+    names = [feed('index'), feed('profile', post.author.username)]
+    if group_slug:
+        names.append(feed('group', group_slug))
+    return names
+
+
+def recent_ids(name, posts):
+    """Кольцо ленты name: (id, вся ли лента в нём).
+
+    При промахе кольцо строится запросом только по id.
+    """
+    key = _key(name)
+    ring = cache.shared.get(key)
+    if ring is None:
+        ids = list(posts.order_by('-pub_date', '-pk')
+                   .values_list('pk', flat=True)[:RING_SIZE])
+        ring = (ids, len(ids) < RING_SIZE)
+        cache.shared.set(key, ring, RING_TIMEOUT)
+    return ring
+
+
+def page_posts(name, posts, number, per_page, total):
+    """Записи постов страницы number из кольца или None, если её там нет.
+
+    total — число постов в ленте по paginator. Если кольцо с ним не
+    сходится (пост из откаченной транзакции или удалённый без сигналов),
+    кольцо сбрасывается и страница берётся обычным запросом.
+    """
+    ids, complete = recent_ids(name, posts)
+    start = (number - 1) * per_page
+    end = start + per_page
+    if end > len(ids) and not complete:
+        return None
+    page_ids = ids[start:end]
+    found = records.get_records(page_ids, posts)
+    expected = max(min(per_page, total - start), 0)
+    if not len(found) == len(page_ids) == expected:
+        discard([name])
+        return None
+    return [found[pk] for pk in page_ids]
+
+
+def _update(names, change):
+    for name in names:
+        key = _key(name)
+        lock_key = f'lock:{key}'
+        if not cache.shared.add(lock_key, 1, LOCK_TIMEOUT):
+            cache.shared.delete(key)
+            continue
+        try:
+            ring = cache.shared.get(key)
+            if ring is not None:
+                ids, complete = ring
+                ids = change(ids)
+                complete = complete and len(ids) <= RING_SIZE
+                cache.shared.set(key, (ids[:RING_SIZE], complete),
+                                 RING_TIMEOUT)
+        finally:
+            cache.shared.delete(lock_key)
+
+
+def push(post_id, names):
+    """Дописывает новый пост в начало колец."""
+    _update(names, lambda ids: [post_id] + [pk for pk in ids
+                                            if pk != post_id])
+
+
+def remove(post_id, names):
+    _update(names, lambda ids: [pk for pk in ids if pk != post_id])
+
+
+def discard(names):
+    """Сбрасывает кольца, порядок в которых нельзя поправить на месте."""
+    cache.shared.delete_many([_key(name) for name in names])
@@ -0,0 +1,94 @@
+"""Полнотекстовый поиск по текстам постов.
+
+В SQLite тексты индексируются виртуальной таблицей FTS5, которую
+триггеры держат в согласии с posts_post. Если FTS5 недоступен (другая
+СУБД или сборка SQLite без расширения), поиск откатывается на обычный
+LIKE из админки.
+"""
+from django.db import connection
+
+FTS_TABLE: str = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); "
+    f"END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def fts_supported(conn=connection):
+    """Собран ли SQLite с FTS5."""
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def install(schema_editor):
+    """Создаёт индекс и триггеры и заполняет индекс текущими постами.
+
+    SQLite пересоздаёт таблицу при изменении её схемы и теряет триггеры,
+    поэтому миграции, меняющие posts_post, вызывают install повторно.
+    """
+    if fts_supported(schema_editor.connection):
+        for statement in INSTALL_SQL:
+            schema_editor.execute(statement)
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in UNINSTALL_SQL:
+            schema_editor.execute(statement)
+
+
+def fts_enabled(conn=connection):
+    return (conn.vendor == 'sqlite'
+            and FTS_TABLE in conn.introspection.table_names())
+
+
+def match_expression(term):
+    """Запрос FTS5: все слова термина как префиксы, в кавычках.
+
+    Кавычки не дают словам вроде AND, NOT или звёздочкам из ввода
+    превратиться в синтаксис запроса.
+    """
+    words = term.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""'))
+                    for word in words)
+
+
+def search_posts(queryset, term):
+    """Посты queryset, в тексте которых есть все слова term.
+
+    Не filter(pk__in=RawSQL(...)): Django оборачивает подзапрос во
+    вторые скобки, и SQLite читает его как скаляр — первую строку.
+    """
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[f'"{table}"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[match_expression(term)])
@@ -0,0 +1,202 @@
+"""Быстрое заполнение базы данными для стендов, бенчмарков и тестов."""
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .cache import invalidate_all
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+CHUNK_SIZE: int = 2000
+LOCALE: str = 'ru_RU'
+DAYS_SPAN: int = 365
+
+
+def zipf_weights(count, alpha):
+    """Кумулятивные веса степенного распределения для random.choices."""
+    return list(itertools.accumulate(
+        1 / (rank ** alpha) for rank in range(1, count + 1)))
+
+
+def _fake_chunk(job):
+    """Генерирует порцию данных Faker'ом; выполняется в процессе-воркере."""
+    from faker import Faker
+
+    kind, start, count, seed = job
+    fake = Faker(LOCALE)
+    fake.seed_instance(seed + start)
+    if kind == 'users':
+        return [
+            (f'{fake.user_name()}_{start + i}', fake.first_name(),
+             fake.last_name())
+            for i in range(count)
+        ]
+    if kind == 'groups':
+        return [
+            (fake.sentence(nb_words=3)[:-1], f'group-{start + i}',
+             fake.paragraph())
+            for i in range(count)
+        ]
+    return [fake.text(max_nb_chars=300) for _ in range(count)]
+
+
+def _generate(kind, total, workers, seed, offset=0):
+    """Отдаёт сгенерированные данные порциями, параллельно при workers > 1.
+
+    offset сдвигает номера записей, чтобы имена и адреса не пересекались
+    с созданными при предыдущих запусках.
+    """
+    jobs = [
+        (kind, offset + start, min(CHUNK_SIZE, total - start), seed)
+        for start in range(0, total, CHUNK_SIZE)
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(_fake_chunk, jobs)
+    else:
+        yield from map(_fake_chunk, jobs)
+
+
+@contextmanager
+def _explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы задать даты самостоятельно."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _new_ids(model, before):
+    return list(model.objects.filter(pk__gt=before).order_by('pk')
+                .values_list('pk', flat=True))
+
+
+def _last_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return last or 0
+
+
+def _random_dates(rnd, now, count):
+    return (now - timedelta(seconds=rnd.random() * DAYS_SPAN * 86400)
+            for _ in range(count))
+
+
+def seed(users=100, groups=10, posts=1000, comments=1000, follows=10,
+         batch_size=None, workers=0, random_seed=0, alpha=1.1,
+         log=None):
+    """Создаёт пользователей, группы, посты, комментарии и подписки.
+
+    Все записи создаются через bulk_create пачками по batch_size (по
+    умолчанию максимум, который допускает СУБД), поэтому сигналы моделей
+    не отправляются, а кэш страниц сбрасывается один раз в конце. Авторы
+    постов, популярность групп и число подписчиков у авторов распределены
+    по степенному закону с показателем alpha. Возвращает словарь с
+    количеством созданных записей.
+    """
+    rnd = random.Random(random_seed)
+    now = timezone.now()
+    log = log or (lambda message: None)
+    created = {}
+
+    before = _last_id(User)
+    password = make_password(None)
+    for chunk in _generate('users', users, workers, random_seed, before):
+        User.objects.bulk_create(
+            [User(username=username, first_name=first_name,
+                  last_name=last_name, password=password)
+             for username, first_name, last_name in chunk],
+            batch_size=batch_size)
+    user_ids = _new_ids(User, before)
+    created['users'] = len(user_ids)
+    log(f'Пользователей: {len(user_ids)}')
+
+    before = _last_id(Group)
+    for chunk in _generate('groups', groups, workers, random_seed, before):
+        Group.objects.bulk_create(
+            [Group(title=title, slug=slug, description=description)
+             for title, slug, description in chunk],
+            batch_size=batch_size)
+    group_ids = _new_ids(Group, before)
+    created['groups'] = len(group_ids)
+    log(f'Групп: {len(group_ids)}')
+
+    if not user_ids:
+        invalidate_all()
+        return created
+    author_weights = zipf_weights(len(user_ids), alpha)
+    group_weights = zipf_weights(len(group_ids), alpha) if group_ids else None
+
+    before = _last_id(Post)
+    date_fields = (Post._meta.get_field('pub_date'),
+                   Comment._meta.get_field('created'))
+    with _explicit_dates(*date_fields):
+        created['posts'] = 0
+        for chunk in _generate('texts', posts, workers, random_seed):
+            authors = rnd.choices(user_ids, cum_weights=author_weights,
+                                  k=len(chunk))
+            post_groups = (
+                rnd.choices(group_ids, cum_weights=group_weights,
+                            k=len(chunk))
+                if group_ids else [None] * len(chunk))
+            Post.objects.bulk_create(
+                [Post(text=text, author_id=author_id, group_id=group_id,
+                      pub_date=pub_date)
+                 for text, author_id, group_id, pub_date in zip(
+                     chunk, authors, post_groups,
+                     _random_dates(rnd, now, len(chunk)))],
+                batch_size=batch_size)
+            created['posts'] += len(chunk)
+            log(f'Постов: {created["posts"]}')
+        post_ids = _new_ids(Post, before)
+
+        created['comments'] = 0
+        if post_ids:
+            post_weights = zipf_weights(len(post_ids), alpha)
+            for chunk in _generate('texts', comments, workers,
+                                   random_seed + 1):
+                Comment.objects.bulk_create(
+                    [Comment(text=text, author_id=author_id,
+                             post_id=post_id, created=created_at)
+                     for text, author_id, post_id, created_at in zip(
+                         chunk,
+                         rnd.choices(user_ids, k=len(chunk)),
+                         rnd.choices(post_ids, cum_weights=post_weights,
+                                     k=len(chunk)),
+                         _random_dates(rnd, now, len(chunk)))],
+                    batch_size=batch_size)
+                created['comments'] += len(chunk)
+        log(f'Комментариев: {created["comments"]}')
+
+    created['follows'] = _seed_follows(
+        rnd, user_ids, author_weights, follows, batch_size)
+    log(f'Подписок: {created["follows"]}')
+    invalidate_all()
+    return created
+
+
+def _seed_follows(rnd, user_ids, author_weights, per_user, batch_size):
+    """Подписки: у популярных авторов подписчиков на порядки больше."""
+    before = Follow.objects.count()
+    batch = []
+    for user_id in user_ids:
+        authors = set(rnd.choices(user_ids, cum_weights=author_weights,
+                                  k=per_user))
+        authors.discard(user_id)
+        batch.extend(Follow(user_id=user_id, author_id=author_id)
+                     for author_id in authors)
+        if len(batch) >= CHUNK_SIZE:
+            Follow.objects.bulk_create(batch, batch_size=batch_size,
+                                       ignore_conflicts=True)
+            batch = []
+    Follow.objects.bulk_create(batch, batch_size=batch_size,
+                               ignore_conflicts=True)
+    return Follow.objects.count() - before
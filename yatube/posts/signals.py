@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import lookups, records, rings
+from .cache import bump, feed
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def forget_now_and_on_commit(forget, *args):
+    """Сбрасывает кэш сразу и ещё раз после фиксации транзакции.
+
+    Пока транзакция не зафиксирована, другой запрос может пересчитать
+    значение по старым данным и снова положить его в кэш.
+    """
+    forget(*args)
+    transaction.on_commit(lambda: forget(*args))
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    """Запоминает прежнюю группу редактируемого поста."""
+    instance._previous_group_slug = None
+    if instance.pk:
+        instance._previous_group_slug = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group__slug', flat=True).first())
+
+
+# Записи и кольца обновляются раньше поколений лент: страница,
+# пересобранная после сброса поколения, должна уже видеть новый пост.
+# Поколения сдвигаются и после фиксации: иначе страница, собранная по
+# старым данным до неё, легла бы в кэш под новым поколением и ETag.
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_post_record(sender, instance, **kwargs):
+    records.forget([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+def update_feed_rings(sender, instance, created, **kwargs):
+    group = instance.group.slug if instance.group_id else None
+    if created:
+        names = rings.post_feeds(instance, group)
+        rings.push(instance.pk, names)
+        transaction.on_commit(lambda: rings.push(instance.pk, names))
+        return
+    previous = getattr(instance, '_previous_group_slug', None)
+    if previous != group:
+        if previous:
+            rings.remove(instance.pk, [feed('group', previous)])
+        if group:
+            rings.discard([feed('group', group)])
+
+
+@receiver(post_delete, sender=Post)
+def prune_feed_rings(sender, instance, **kwargs):
+    group = instance.group.slug if instance.group_id else None
+    rings.remove(instance.pk, rings.post_feeds(instance, group))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    feeds = [
+        feed('index'),
+        feed('profile', instance.author.username),
+        feed('post', instance.pk),
+    ]
+    if instance.group_id:
+        feeds.append(feed('group', instance.group.slug))
+    previous = getattr(instance, '_previous_group_slug', None)
+    if previous:
+        feeds.append(feed('group', previous))
+    forget_now_and_on_commit(bump, *feeds)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    forget_now_and_on_commit(bump, feed('post', instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    forget_now_and_on_commit(bump, feed('follow', instance.user_id))
+
+
+@receiver(post_save, sender=Group)
+def forget_group_records(sender, instance, created, **kwargs):
+    if not created:
+        records.forget(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    forget_now_and_on_commit(bump, feed('index'),
+                             feed('group', instance.slug))
+
+
+@receiver(post_save, sender=Post)
+def forget_missing_post(sender, instance, created, **kwargs):
+    if created:
+        forget_now_and_on_commit(lookups.forget_post, instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_names(sender, instance, update_fields=None,
+                            **kwargs):
+    instance._previous_names = None
+    if instance.pk and not (update_fields
+                            and set(update_fields) <= {'last_login'}):
+        instance._previous_names = (
+            User.objects.filter(pk=instance.pk)
+            .values_list('username', 'first_name', 'last_name').first())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_author(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    previous = getattr(instance, '_previous_names', None)
+    forget_now_and_on_commit(lookups.forget_author, instance,
+                             previous[0] if previous else None)
+    names = (instance.username, instance.first_name, instance.last_name)
+    if previous and previous != names:
+        # Имя автора записано в записях его постов
+        forget_now_and_on_commit(
+            records.forget, list(instance.posts.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, update_fields=None,
+                            **kwargs):
+    # У нового пользователя ещё нет страниц, а вход сохраняет только
+    # last_login — страницы не меняются.
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    feeds = [feed('index'), feed('profile', instance.username)]
+    previous = getattr(instance, '_previous_names', None)
+    names = (instance.username, instance.first_name, instance.last_name)
+    if previous and previous != names:
+        # Имя автора есть на его старом профиле, в группах с его постами,
+        # на страницах его постов и постов с его комментариями
+        if previous[0] != instance.username:
+            feeds.append(feed('profile', previous[0]))
+        slugs = (Group.objects.filter(posts__author=instance)
+                 .values_list('slug', flat=True).distinct())
+        post_ids = set(instance.posts.values_list('pk', flat=True))
+        post_ids.update(instance.comments.values_list('post_id', flat=True))
+        feeds.extend(feed('group', slug) for slug in slugs)
+        feeds.extend(feed('post', pk) for pk in sorted(post_ids))
+    forget_now_and_on_commit(bump, *feeds)
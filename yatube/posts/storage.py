@@ -0,0 +1,114 @@
+"""Хранилища картинок постов с прямой загрузкой файлов клиентом.
+
+Клиент получает подписанную форму загрузки (presigned_upload), отправляет
+картинку прямо в хранилище и затем сохраняет пост с ключом объекта,
+так что байты картинки не проходят через воркер Django.
+"""
+import mimetypes
+import posixpath
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+
+UPLOAD_SALT: str = 'posts.storage.upload'
+
+
+@deconstructible
+class UploadFileSystemStorage(FileSystemStorage):
+    """Локальная замена объектного хранилища для разработки и тестов.
+
+    Подписанная форма ведёт на posts:upload_image, который проверяет
+    подпись и кладёт файл в MEDIA_ROOT под выданным ключом.
+    """
+
+    def presigned_upload(self, key, content_type, max_size, expires):
+        token = signing.dumps(
+            {'key': key, 'type': content_type, 'size': max_size},
+            salt=UPLOAD_SALT)
+        return {
+            'url': reverse('posts:upload_image'),
+            'fields': {'token': token},
+        }
+
+    @staticmethod
+    def check_upload(token, expires):
+        """Данные загрузки из подписи; BadSignature, если подпись чужая."""
+        return signing.loads(token, salt=UPLOAD_SALT, max_age=expires)
+
+
+@deconstructible
+class S3Storage(Storage):
+    """Файлы в S3-совместимом хранилище (AWS S3, MinIO и т. п.).
+
+    Нужен пакет boto3. Настройки: S3_BUCKET, S3_ENDPOINT_URL,
+    S3_ACCESS_KEY, S3_SECRET_KEY, S3_REGION и S3_PUBLIC_URL — адрес,
+    по которому объекты бакета доступны на чтение.
+    """
+
+    def __init__(self, client=None):
+        self.bucket = settings.S3_BUCKET
+        self.public_url = settings.S3_PUBLIC_URL.rstrip('/')
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise ImproperlyConfigured(
+                    'Для S3Storage установите пакет boto3.')
+            client = boto3.client(
+                's3',
+                endpoint_url=settings.S3_ENDPOINT_URL or None,
+                aws_access_key_id=settings.S3_ACCESS_KEY or None,
+                aws_secret_access_key=settings.S3_SECRET_KEY or None,
+                region_name=settings.S3_REGION or None,
+            )
+        self.client = client
+
+    def _open(self, name, mode='rb'):
+        body = self.client.get_object(Bucket=self.bucket, Key=name)['Body']
+        return ContentFile(body.read(), name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        content_type = (mimetypes.guess_type(name)[0]
+                        or 'application/octet-stream')
+        self.client.put_object(Bucket=self.bucket, Key=name, Body=content,
+                               ContentType=content_type)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Ключи загрузок уникальны, а проверка exists — лишний запрос к S3
+        return name
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def size(self, name):
+        return self.client.head_object(
+            Bucket=self.bucket, Key=name)['ContentLength']
+
+    def url(self, name):
+        return f'{self.public_url}/{posixpath.normpath(name)}'
+
+    def presigned_upload(self, key, content_type, max_size, expires):
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_size],
+            ],
+            ExpiresIn=expires,
+        )
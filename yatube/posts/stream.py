@@ -0,0 +1,288 @@
+"""Поток Server-Sent Events о новых постах и комментариях.
+
+Поток отдаёт отдельный процесс на asyncio (команда stream): открытое
+соединение — это корутина, а не воркер WSGI, так что тысячи
+простаивающих читателей обходятся дёшево. Один опросчик раз в
+POLL_INTERVAL читает новые строки Post и Comment по курсору id и
+раздаёт их через Hub подписчикам нужных лент: главной, группы, автора
+(профиль и подписки) и страницы поста.
+
+Перед потоком ставится прокси с адресом STREAM_URL, который передаёт
+ему куки сайта: по сессии определяются авторы ленты подписок.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from http.cookies import CookieError, SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.db import close_old_connections
+from django.db.models import Max
+from django.urls import reverse
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+PATH: str = '/stream/'
+POLL_INTERVAL: float = 1.0
+HEARTBEAT: float = 15.0
+QUEUE_SIZE: int = 100
+BATCH_SIZE: int = 200
+REQUEST_TIMEOUT: float = 10.0
+
+
+def format_event(kind, object_id, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f'id: {kind}-{object_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+def post_keys(author_id, group_slug=None):
+    keys = ['index', f'author:{author_id}']
+    if group_slug:
+        keys.append(f'group:{group_slug}')
+    return keys
+
+
+class Subscription:
+    """Очередь событий одного соединения и ключи его лент.
+
+    Переполненная очередь значит, что клиент не успевает читать, и его
+    соединение закрывается.
+    """
+
+    def __init__(self, keys, size=QUEUE_SIZE):
+        self.keys = frozenset(keys)
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Hub:
+    """Раздаёт события подписчикам лент; живёт в одном цикле asyncio."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+
+    def __len__(self):
+        return len(set().union(*self.subscribers.values()))
+
+    def subscribe(self, keys, size=QUEUE_SIZE):
+        subscription = Subscription(keys, size)
+        for key in subscription.keys:
+            self.subscribers[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for key in subscription.keys:
+            self.subscribers[key].discard(subscription)
+            if not self.subscribers[key]:
+                del self.subscribers[key]
+
+    def publish(self, keys, message):
+        """Отправляет message один раз каждому подписчику любой из лент."""
+        targets = set()
+        for key in keys:
+            targets.update(self.subscribers.get(key, ()))
+        for subscription in targets:
+            subscription.put(message)
+        return len(targets)
+
+
+def latest_cursor():
+    close_old_connections()
+    return (Post.objects.aggregate(last=Max('pk'))['last'] or 0,
+            Comment.objects.aggregate(last=Max('pk'))['last'] or 0)
+
+
+def fetch_new(cursor, limit=BATCH_SIZE):
+    """Посты и комментарии новее cursor = (id поста, id комментария).
+
+    Возвращает список (ключи лент, событие) и новый курсор.
+    """
+    close_old_connections()
+    post_cursor, comment_cursor = cursor
+    messages = []
+    posts = (Post.objects.visible().filter(pk__gt=post_cursor)
+             .select_related('author', 'group').order_by('pk')[:limit])
+    for post in posts:
+        group = (post.group.slug
+                 if post.group_id and post.group.is_active else None)
+        messages.append((post_keys(post.author_id, group), format_event(
+            'post', post.pk, {
+                'id': post.pk,
+                'author': post.author.username,
+                'group': group,
+                'url': reverse('posts:post_detail', args=[post.pk]),
+            })))
+        post_cursor = post.pk
+    comments = (Comment.objects.visible().filter(pk__gt=comment_cursor)
+                .select_related('author').order_by('pk')[:limit])
+    for comment in comments:
+        messages.append(([f'post:{comment.post_id}'], format_event(
+            'comment', comment.pk, {
+                'id': comment.pk,
+                'post': comment.post_id,
+                'author': comment.author.username,
+                'text': comment.text,
+            })))
+        comment_cursor = comment.pk
+    return messages, (post_cursor, comment_cursor)
+
+
+def session_user_id(session_key):
+    if not session_key:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    user_id = engine.SessionStore(session_key).get(SESSION_KEY)
+    if user_id and User.objects.filter(pk=user_id, is_active=True).exists():
+        return user_id
+    return None
+
+
+def resolve_feed(params, session_key=None):
+    """Ключи лент для параметров запроса; None — такой ленты нет."""
+    close_old_connections()
+    feed = params.get('feed')
+    if feed == 'index':
+        return ['index']
+    if feed == 'group':
+        slug = params.get('slug', '')
+        if Group.objects.filter(slug=slug, is_active=True).exists():
+            return [f'group:{slug}']
+    elif feed == 'profile':
+        author = (User.objects.filter(username=params.get('username', ''),
+                                      is_active=True)
+                  .values_list('pk', flat=True).first())
+        if author:
+            return [f'author:{author}']
+    elif feed == 'post':
+        post_id = params.get('id', '')
+        if post_id.isdigit() and Post.objects.visible().filter(
+                pk=post_id).exists():
+            return [f'post:{post_id}']
+    elif feed == 'follow':
+        user_id = session_user_id(session_key)
+        if user_id:
+            return [f'author:{author}' for author in Follow.objects.filter(
+                user_id=user_id).values_list('author_id', flat=True)]
+    return None
+
+
+def _parse_request(raw):
+    lines = raw.decode('latin-1').split('\r\n')
+    method, target, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if value:
+            headers[name.strip().lower()] = value.strip()
+    return method, urlsplit(target), headers
+
+
+def _session_key(headers):
+    try:
+        cookie = SimpleCookie(headers.get('cookie', ''))
+    except CookieError:
+        return None
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    return morsel.value if morsel else None
+
+
+def _status(writer, status, reason):
+    body = reason.encode()
+    writer.write(
+        f'HTTP/1.1 {status} {reason}\r\n'
+        f'Content-Type: text/plain; charset=utf-8\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: close\r\n\r\n'.encode() + body)
+
+
+class Streamer:
+    """HTTP-сервер потока и опросчик базы поверх одного Hub."""
+
+    def __init__(self, hub=None, fetch=fetch_new,
+                 poll_interval=POLL_INTERVAL, heartbeat=HEARTBEAT,
+                 cursor=None):
+        self.hub = hub if hub is not None else Hub()
+        self.fetch = fetch
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.cursor = cursor
+
+    async def poll(self):
+        loop = asyncio.get_running_loop()
+        if self.cursor is None:
+            self.cursor = await loop.run_in_executor(None, latest_cursor)
+        while True:
+            try:
+                messages, self.cursor = await loop.run_in_executor(
+                    None, self.fetch, self.cursor)
+            except Exception:
+                logger.exception('Не удалось прочитать новые записи')
+                messages = []
+            for keys, message in messages:
+                self.hub.publish(keys, message)
+            await asyncio.sleep(self.poll_interval)
+
+    async def handle(self, reader, writer):
+        try:
+            raw = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                         REQUEST_TIMEOUT)
+            method, url, headers = _parse_request(raw)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError, ValueError):
+            writer.close()
+            return
+        if url.path != PATH:
+            _status(writer, 404, 'Not Found')
+        elif method != 'GET':
+            _status(writer, 405, 'Method Not Allowed')
+        else:
+            params = {name: values[0]
+                      for name, values in parse_qs(url.query).items()}
+            keys = await asyncio.get_running_loop().run_in_executor(
+                None, resolve_feed, params, _session_key(headers))
+            if keys is None:
+                _status(writer, 404, 'Not Found')
+            else:
+                await self.stream(writer, keys)
+        writer.close()
+
+    async def stream(self, writer, keys):
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream; charset=utf-8\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'X-Accel-Buffering: no\r\n'
+            b'Connection: keep-alive\r\n\r\n'
+            b'retry: 5000\n\n')
+        subscription = self.hub.subscribe(keys)
+        try:
+            await writer.drain()
+            while not subscription.overflowed:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    message = ': ping\n\n'
+                writer.write(message.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.hub.unsubscribe(subscription)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.poll())
@@ -0,0 +1,26 @@
+"""Фоновые задачи постов; регистрируются при старте приложения core."""
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+
+from . import moderation  # noqa: F401 — задачи массовой модерации
+from .models import Post
+from .purge import purge_pending
+
+THUMBNAIL_GEOMETRY: str = '960x339'
+PURGE_INTERVAL: int = 300
+PURGE_PAUSE: float = 0.05
+
+
+@task(priority=5)
+def make_thumbnail(post_id):
+    """Готовит миниатюру картинки поста, чтобы её не ждала первая лента."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, crop='center',
+                      upscale=True)
+
+
+@task(every=PURGE_INTERVAL)
+def purge_deleted():
+    purge_pending(pause=PURGE_PAUSE)
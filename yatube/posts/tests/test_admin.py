@@ -0,0 +1,238 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import Worker
+
+from .. import admin as posts_admin
+from .. import moderation
+from .. import search
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.admin, group=cls.group, text=f'Пост {i}')
+            for i in range(5))
+        Post.objects.create(author=cls.admin, text='Ёжик в тумане')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def test_changelist_authors_are_selected_with_rows(self):
+        """Авторы строк приходят в одном запросе со списком постов."""
+        def author_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            return [query for query in queries.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and 'FROM "auth_user"' in query['sql']]
+
+        author_queries()  # первый запрос кладёт request.user в кэш
+        few = author_queries()
+        Post.objects.bulk_create(
+            Post(author=self.admin, group=self.group, text=f'Ещё {i}')
+            for i in range(20))
+        self.assertEqual(len(author_queries()), len(few))
+
+    def test_group_column_uses_autocomplete(self):
+        """Группа в строке — виджет автодополнения, а не полный select."""
+        response = self.client.get(self.url)
+        self.assertContains(response, 'admin-autocomplete')
+        other = Group.objects.create(title='Другая группа', slug='other',
+                                     description='Описание')
+        self.assertNotContains(response, other.title)
+        self.assertContains(
+            response, f'selected>{self.group.title}</option>', count=5)
+
+    def test_unfiltered_count_is_estimated(self):
+        """Без фильтров большие таблицы не считаются через COUNT(*)."""
+        with mock.patch.object(posts_admin, 'EXACT_COUNT_LIMIT', 0):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+        self.assertEqual(response.context['cl'].result_count,
+                         Post.objects.latest('pk').pk)
+
+    def require_fts(self):
+        # Проверка обращается к базе, поэтому не при импорте модуля
+        if not search.fts_supported():
+            self.skipTest('SQLite собран без FTS5')
+
+    def test_search_uses_text_index(self):
+        """Поиск идёт по индексу FTS5 и находит слова по префиксу."""
+        self.require_fts()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'q': 'ёжик тум'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [Post.objects.get(text='Ёжик в тумане')])
+        self.assertTrue(any(search.FTS_TABLE in query['sql']
+                            for query in queries.captured_queries))
+
+    def test_search_index_follows_changes(self):
+        """Триггеры обновляют индекс при изменении и удалении постов."""
+        self.require_fts()
+        post = Post.objects.get(text='Ёжик в тумане')
+        post.text = 'Медвежонок'
+        post.save()
+        posts = Post.objects.all()
+        self.assertFalse(search.search_posts(posts, 'ёжик').exists())
+        self.assertTrue(search.search_posts(posts, 'медвежонок').exists())
+        post.delete()
+        self.assertFalse(search.search_posts(posts, 'медвежонок').exists())
+
+    def test_search_finds_every_match(self):
+        self.require_fts()
+        posts = search.search_posts(Post.objects.all(), 'пост')
+        self.assertEqual(posts.count(), 5)
+        self.assertEqual(len(posts.values_list('pk', flat=True)), 5)
+
+    def test_search_expression_is_quoted(self):
+        """Операторы FTS5 из ввода пользователя считаются словами."""
+        self.assertEqual(search.match_expression('a "b" NOT'),
+                         '"a"* """b"""* "NOT"*')
+
+
+class ModerationActionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+        self.posts = [
+            Post.objects.create(author=self.spammer, text=f'Спам {i}')
+            for i in range(7)
+        ]
+        self.own = Post.objects.create(author=self.admin, text='Свой пост')
+
+    def act(self, action, posts, url=None, **data):
+        return self.client.post(url or self.url, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            'index': 0,
+            **data,
+        }, follow=True)
+
+    def test_reassign_group_in_chunks(self):
+        """Перенос в группу идёт порциями по одному UPDATE."""
+        with mock.patch.object(moderation, 'CHUNK_SIZE', 3):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.act('reassign_group_action', self.posts,
+                                    group=self.group.pk)
+        self.assertContains(response, 'обработано постов — 7')
+        self.assertEqual(self.group.posts.count(), 7)
+        updates = [query for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(updates), 3)
+
+    def test_reassign_group_resets_feed_records(self):
+        """Лента после переноса показывает новую группу постов."""
+        group_url = reverse('posts:group_list', args=['test-slug'])
+        self.assertNotContains(Client().get(reverse('posts:index')),
+                               group_url)
+        self.act('reassign_group_action', self.posts, group=self.group.pk)
+        self.assertContains(Client().get(reverse('posts:index')), group_url)
+
+    def test_delete_removes_posts_and_comments(self):
+        """Удаление убирает посты с комментариями, не трогая остальные."""
+        Comment.objects.create(post=self.posts[0], author=self.admin,
+                               text='Комментарий')
+        self.act('delete_posts_action', self.posts[:2])
+        self.assertFalse(Post.objects.filter(
+            pk__in=[post.pk for post in self.posts[:2]]).exists())
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_by_author(self):
+        """Удаление по автору убирает все его посты, даже не выбранные."""
+        self.act('delete_author_posts_action', self.posts[:1])
+        self.assertEqual(list(Post.objects.all()), [self.own])
+
+    def test_default_delete_action_is_disabled(self):
+        response = self.client.get(self.url)
+        choices = response.context['action_form'].fields['action'].choices
+        self.assertNotIn('delete_selected', dict(choices))
+
+    def test_large_selection_runs_in_background(self):
+        """Большие выборки уходят в очередь задач."""
+        with mock.patch.object(moderation, 'BACKGROUND_THRESHOLD', 5):
+            response = self.act('delete_posts_action', self.posts)
+        self.assertContains(response, 'обрабатываются в фоне')
+        self.assertEqual(Post.objects.count(), 8)
+        Worker().run(burst=True)
+        self.assertEqual(list(Post.objects.all()), [self.own])
+        task = Task.objects.get(name=moderation.moderate.name)
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.progress, 'Удаление: 7 из 7')
+
+    def test_select_all_is_not_counted_in_request(self):
+        """«Выбрать все» без фильтров не считает всю таблицу в запросе."""
+        with mock.patch.object(moderation, 'BACKGROUND_THRESHOLD', 5), \
+                mock.patch.object(posts_admin, 'EXACT_COUNT_LIMIT', 0), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.act('delete_posts_action', self.posts[:1],
+                                select_across='1')
+        self.assertContains(response, 'обрабатываются в фоне')
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'COUNT(' in query['sql']])
+        Worker().run(burst=True)
+        self.assertFalse(Post.objects.exists())
+        task = Task.objects.get(name=moderation.moderate.name)
+        self.assertEqual(task.progress, 'Удаление: 8 из 8')
+
+    def test_background_task_gets_selection_criteria(self):
+        """В задачу уходят фильтры списка, а не ключи всех постов."""
+        with mock.patch.object(moderation, 'BACKGROUND_THRESHOLD', 5):
+            self.act('delete_posts_action', self.posts[:1],
+                     url=self.url + '?q=Спам', select_across='1')
+        task = Task.objects.get(name=moderation.moderate.name)
+        self.assertEqual(json.loads(task.payload)['args'][2], {
+            'filters': {}, 'search': 'Спам', 'last': self.own.pk})
+        late = Post.objects.create(author=self.spammer, text='Спам поздний')
+        Worker().run(burst=True)
+        self.assertEqual(list(Post.objects.order_by('pk')),
+                         [self.own, late])
+
+    def test_author_selection_runs_in_background(self):
+        with mock.patch.object(moderation, 'BACKGROUND_THRESHOLD', 5):
+            self.act('delete_author_posts_action', self.posts[:1])
+        task = Task.objects.get(name=moderation.moderate.name)
+        self.assertEqual(json.loads(task.payload)['args'][2],
+                         {'authors': [self.spammer.pk]})
+        Worker().run(burst=True)
+        self.assertEqual(list(Post.objects.all()), [self.own])
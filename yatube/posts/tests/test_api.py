@@ -0,0 +1,174 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import cache as page_cache
+from ..models import Comment, Follow, Group, Post
+from ..purge import schedule
+
+User = get_user_model()
+TEST_POSTS_COUNT: int = 13
+
+
+class PostsAPITests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.author, text=f'Пост {i}', group=cls.group)
+            for i in range(TEST_POSTS_COUNT)
+        ])
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def walk(self, url, client=None):
+        client = client or self.guest_client
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids.extend(post['id'] for post in data['results'])
+            url = data['next']
+        return ids
+
+    def test_feeds_walk_all_posts_by_cursor(self):
+        """Курсор проходит ленту без пропусков и повторов."""
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-pk').values_list('pk', flat=True))
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url + '?limit=5'), expected)
+
+    def test_post_schema(self):
+        response = self.guest_client.get(reverse('posts:api_index'))
+        post = response.json()['results'][0]
+        self.assertEqual(post['id'], self.post.pk)
+        self.assertEqual(post['author'], 'author')
+        self.assertEqual(post['author_name'], 'Лев Толстой')
+        self.assertEqual(post['group'], 'test-slug')
+        self.assertIsNone(post['image'])
+
+    def test_bad_cursor_and_missing_objects(self):
+        cases = (
+            (reverse('posts:api_index') + '?cursor=zzz', 400),
+            (reverse('posts:api_index') + '?limit=x', 400),
+            (reverse('posts:api_group_list', kwargs={'slug': 'nope'}), 404),
+            (reverse('posts:api_profile', kwargs={'username': 'nope'}), 404),
+            (reverse('posts:api_post_detail', kwargs={'post_id': 0}), 404),
+            (reverse('posts:api_follow_index'), 401),
+        )
+        for url, status in cases:
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code,
+                                 status)
+
+    def test_not_modified_until_new_post(self):
+        """Клиент получает 304, пока в ленте не появился новый пост."""
+        url = reverse('posts:api_index')
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый пост')
+
+    def test_follow_feed_revalidates_on_subscription(self):
+        url = reverse('posts:api_follow_index')
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.json()['results'], [])
+        etag = response['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_post_detail_revalidates_on_comment(self):
+        url = reverse('posts:api_post_detail',
+                      kwargs={'post_id': self.post.pk})
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Комментарий')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments'][0]['text'],
+                         'Комментарий')
+
+    def test_edit_changes_validators(self):
+        """Правка поста меняет ETag ленты и страницы поста."""
+        urls = (reverse('posts:api_index'),
+                reverse('posts:api_post_detail',
+                        kwargs={'post_id': self.post.pk}))
+        etags = [self.guest_client.get(url)['ETag'] for url in urls]
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Исправленный пост')
+
+    def test_delete_does_not_move_last_modified_back(self):
+        url = reverse('posts:api_index')
+        newest = Post.objects.create(author=self.author, text='Новый пост')
+        since = self.guest_client.get(url)['Last-Modified']
+        with mock.patch.object(page_cache.time, 'time',
+                               return_value=time.time() + 1):
+            newest.delete()
+        response = self.guest_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Новый пост')
+
+    def test_hidden_group_and_author_are_not_revalidated(self):
+        """Скрытые группа и автор отвечают 404, а не 304."""
+        urls = (
+            reverse('posts:api_group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'author'}),
+        )
+        headers = {}
+        for url in urls:
+            response = self.guest_client.get(url)
+            headers[url] = {
+                'HTTP_IF_NONE_MATCH': response['ETag'],
+                'HTTP_IF_MODIFIED_SINCE': response['Last-Modified'],
+            }
+        schedule(Group.objects.get(pk=self.group.pk))
+        schedule(User.objects.get(pk=self.author.pk))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url, **headers[url]).status_code,
+                    404)
+
+    def test_follow_feed_is_private(self):
+        url = reverse('posts:api_follow_index')
+        response = self.authorized_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('private', response['Cache-Control'])
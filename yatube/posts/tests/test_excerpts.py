@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..utils import ELLIPSIS, make_excerpt
+
+User = get_user_model()
+LONG_TEXT = ' '.join(['слово'] * 100) + ' финал'
+
+
+class MakeExcerptTests(SimpleTestCase):
+    def test_short_text_unchanged(self):
+        self.assertEqual(make_excerpt('Короткий пост', 20), 'Короткий пост')
+
+    def test_cut_at_word_boundary(self):
+        self.assertEqual(make_excerpt('один два три четыре', 12),
+                         'один два' + ELLIPSIS)
+
+    def test_long_word_cut_inside(self):
+        self.assertEqual(make_excerpt('а' * 30, 10), 'а' * 10 + ELLIPSIS)
+
+
+class PostExcerptTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text=LONG_TEXT)
+
+    def test_save_and_bulk_create_fill_excerpt(self):
+        self.assertEqual(self.post.excerpt, make_excerpt(LONG_TEXT))
+        self.assertTrue(self.post.excerpt_truncated)
+        self.post.text = 'Новый текст'
+        self.post.save(update_fields=['text'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, 'Новый текст')
+        self.assertFalse(self.post.excerpt_truncated)
+        Post.objects.bulk_create([Post(author=self.author, text=LONG_TEXT)])
+        self.assertEqual(Post.objects.get(text=LONG_TEXT).excerpt,
+                         make_excerpt(LONG_TEXT))
+
+    def test_short_text_with_ellipsis_is_not_truncated(self):
+        """Своё многоточие в конце короткого поста — не обрезка."""
+        post = Post.objects.create(author=self.author,
+                                   text='Продолжение следует' + ELLIPSIS)
+        self.assertFalse(post.excerpt_truncated)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'читать дальше', count=1)
+
+    def test_feed_shows_excerpt_without_text(self):
+        """Лента читает только начало текста и ссылается на пост."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse([query for query in queries
+                          if '"posts_post"."text"' in query['sql']])
+        self.assertContains(response, make_excerpt(LONG_TEXT))
+        self.assertNotContains(response, 'финал')
+        self.assertContains(response, 'читать дальше')
+
+    def test_detail_shows_full_text(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertContains(response, 'финал')
+
+    def test_backfill_fills_empty_excerpts(self):
+        Post.objects.filter(pk=self.post.pk).update(excerpt='')
+        out = StringIO()
+        call_command('backfill_excerpts', pause=0, stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, make_excerpt(LONG_TEXT))
+        self.assertTrue(self.post.excerpt_truncated)
+        self.assertIn('Обновлено постов: 1', out.getvalue())
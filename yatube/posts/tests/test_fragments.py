@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..fragments import NEXT_HEADER
+from ..models import Follow, Group, Post
+from ..views import LIMIT
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, LOCAL_CACHE_SIZE=0)
+class FragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(LIMIT * 2 + 3))
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def collect(self, client, url):
+        """Проходит по цепочке X-Next и возвращает id всех постов."""
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotContains(response, '<html')
+            ids += [post.pk for post in response.context['posts']]
+            url = response.get(NEXT_HEADER)
+        return ids
+
+    def test_chain_covers_feed(self):
+        """Цепочка фрагментов отдаёт всю ленту без повторов и пропусков."""
+        expected = list(Post.objects.order_by('-pub_date', '-pk')
+                        .values_list('pk', flat=True))
+        cases = (
+            (self.client, reverse('posts:fragment_index')),
+            (self.client, reverse('posts:fragment_group_list',
+                                  args=[self.group.slug])),
+            (self.client, reverse('posts:fragment_profile',
+                                  args=[self.author.username])),
+            (self.reader_client, reverse('posts:fragment_follow_index')),
+        )
+        for client, url in cases:
+            with self.subTest(url=url):
+                self.assertEqual(self.collect(client, url), expected)
+
+    def test_pages_link_to_next_fragment(self):
+        """Страница ссылается на фрагмент после своего последнего поста."""
+        response = self.client.get(reverse('posts:index'))
+        more_url = response.context['more_url']
+        self.assertContains(response, 'Показать ещё')
+        fragment = self.client.get(more_url)
+        self.assertEqual(
+            [post.pk for post in fragment.context['posts']],
+            [post.pk for post in Post.objects.all()[LIMIT:LIMIT * 2]])
+        self.assertLess(len(fragment.content), len(response.content))
+        last_page = self.client.get(reverse('posts:index') + '?page=3')
+        self.assertIsNone(last_page.context['more_url'])
+
+    def test_bad_cursor_and_anonymous_follow(self):
+        url = reverse('posts:fragment_index') + '?cursor=bad'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(reverse('posts:fragment_follow_index'))
+        self.assertEqual(response.status_code, 302)
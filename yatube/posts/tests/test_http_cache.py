@@ -0,0 +1,130 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date
+
+from .. import cache as page_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, LOCAL_CACHE_SIZE=0)
+class ConditionalFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост',
+                                       group=cls.group)
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_last_modified_from_latest_update(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertGreaterEqual(
+                    parse_http_date(response['Last-Modified']),
+                    int(self.post.updated.timestamp()))
+                self.assertTrue(response.has_header('ETag'))
+                self.assertIn('Cookie', response['Vary'])
+
+    def test_not_modified_skips_rendering(self):
+        """Аноним получает 304 без рендера шаблона."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                etag = response['ETag']
+                since = response['Last-Modified']
+                for headers in ({'HTTP_IF_MODIFIED_SINCE': since},
+                                {'HTTP_IF_NONE_MATCH': etag}):
+                    response = self.guest_client.get(url, **headers)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertIsNone(response.context)
+
+    def test_new_post_invalidates(self):
+        since = http_date(self.post.updated.timestamp())
+        Post.objects.filter(pk=self.post.pk).update(
+            updated=self.post.updated + timedelta(minutes=1))
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, 200)
+
+    def test_edit_and_delete_change_etag(self):
+        """Правка и удаление поста меняют ETag всех его лент."""
+        older = Post.objects.create(author=self.author, text='Старый',
+                                    group=self.group)
+        for change in (lambda: older.save(), lambda: older.delete()):
+            etags = [self.guest_client.get(url)['ETag']
+                     for url in self.urls]
+            change()
+            for url, etag in zip(self.urls, etags):
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_delete_moves_last_modified_forward(self):
+        """Удаление самого нового поста не возвращает Last-Modified назад."""
+        newest = Post.objects.create(author=self.author, text='Новый',
+                                     group=self.group)
+        since = {url: self.guest_client.get(url)['Last-Modified']
+                 for url in self.urls}
+        # Заголовки с точностью до секунды: удаление — секундой позже
+        with mock.patch.object(page_cache.time, 'time',
+                               return_value=time.time() + 1):
+            newest.delete()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Новый')
+
+    def test_hidden_group_is_not_revalidated(self):
+        """Скрытая группа отвечает 404, а не 304 по старым валидаторам."""
+        url = self.urls[1]
+        response = self.guest_client.get(url)
+        headers = {'HTTP_IF_NONE_MATCH': response['ETag'],
+                   'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+        Group.objects.filter(pk=self.group.pk).update(is_active=False)
+        self.assertEqual(self.guest_client.get(url, **headers).status_code,
+                         404)
+        headers.pop('HTTP_IF_NONE_MATCH')
+        self.assertEqual(self.guest_client.get(url, **headers).status_code,
+                         404)
+
+    def test_authorized_user_always_rendered(self):
+        since = http_date(self.post.pub_date.timestamp())
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=since)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_missing_group_is_not_cached(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'nope'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('Cache-Control'))
@@ -0,0 +1,182 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.db import connection, transaction
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.bloom import BloomFilter
+
+from .. import lookups, purge
+from ..cache import invalidate_all
+from ..models import Post
+
+User = get_user_model()
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        names = [f'user{i}' for i in range(1000)]
+        bloom = BloomFilter.from_iterable(names, capacity=len(names))
+        self.assertTrue(all(name in bloom for name in names))
+        false_positives = sum(f'bot{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, LOCAL_CACHE_SIZE=0)
+class MissingLookupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_missing_post_and_author_are_404(self):
+        urls = (
+            reverse('posts:post_detail', args=[self.post.pk + 100]),
+            reverse('posts:profile', args=['nobody']),
+            reverse('posts:fragment_profile', args=['nobody']),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_repeated_probes_skip_database(self):
+        """Повторные запросы к несуществующим адресам не идут в базу."""
+        hidden = Post.objects.create(
+            author=User.objects.create_user(username='hidden',
+                                            is_active=False),
+            text='Скрытый')
+        urls = (
+            reverse('posts:post_detail', args=[hidden.pk]),
+            reverse('posts:post_detail', args=[hidden.pk + 1]),
+            reverse('posts:profile', args=['hidden']),
+            reverse('posts:profile', args=['nobody']),
+        )
+        for url in urls:
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            for url in urls:
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_created_objects_are_found(self):
+        """Новые посты и пользователи сбрасывают отрицательный кэш."""
+        next_id = self.post.pk + 1
+        post_url = reverse('posts:post_detail', args=[next_id])
+        profile_url = reverse('posts:profile', args=['newcomer'])
+        self.assertEqual(self.client.get(post_url).status_code, 404)
+        self.assertEqual(self.client.get(profile_url).status_code, 404)
+        newcomer = User.objects.create_user(username='newcomer')
+        Post.objects.create(pk=next_id, author=newcomer, text='Новый')
+        self.assertEqual(self.client.get(post_url).status_code, 200)
+        self.assertEqual(self.client.get(profile_url).status_code, 200)
+
+    def test_reactivated_author_and_bulk_load(self):
+        user = User.objects.create_user(username='sleeper', is_active=False)
+        self.assertFalse(lookups.author_missing('sleeper'))
+        with self.assertRaises(Http404):
+            lookups.get_author_or_404('sleeper')
+        self.assertTrue(lookups.author_missing('sleeper'))
+        user.is_active = True
+        user.save()
+        self.assertFalse(lookups.author_missing('sleeper'))
+        self.assertEqual(lookups.max_post_id(), self.post.pk)
+        Post.objects.bulk_create([Post(author=user, text='Загружен')])
+        invalidate_all()
+        self.assertGreater(lookups.max_post_id(), self.post.pk)
+
+
+class CommitRaceTests(TransactionTestCase):
+    """Значения, пересчитанные до фиксации транзакции, не остаются."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_created_in_transaction_is_found(self):
+        author = User.objects.create_user(username='author')
+        with transaction.atomic():
+            post = Post.objects.create(author=author, text='Пост')
+            # Параллельный запрос запомнил наибольший id до фиксации
+            lookups.cache.set(lookups._key(lookups.MAX_POST_ID), post.pk - 1)
+        self.assertFalse(lookups.post_missing(post.pk))
+
+    def test_user_created_in_transaction_is_found(self):
+        with transaction.atomic():
+            User.objects.create_user(username='newcomer')
+            # Параллельный запрос собрал фильтр имён до фиксации
+            lookups.cache.set(lookups._key(lookups.USERNAMES), (
+                BloomFilter.from_iterable([], capacity=1),
+                time.time() + lookups.FILTER_TIMEOUT, 0))
+        self.assertFalse(lookups.author_missing('newcomer'))
+
+
+class AuthorCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {i}') for i in range(3))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_get_authors_reads_database_once(self):
+        with self.assertNumQueries(1):
+            authors = lookups.get_authors([self.author.pk, self.reader.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                lookups.get_authors([self.author.pk, self.reader.pk]),
+                authors)
+        self.assertEqual(authors[self.author.pk].get_full_name(),
+                         'Лев Толстой')
+
+    def test_author_pages_skip_user_queries(self):
+        """Профиль, подписка и лента берут пользователей из кэша."""
+        client = Client()
+        client.force_login(self.reader)
+        urls = (
+            reverse('posts:profile', args=['author']),
+            reverse('posts:profile_follow', args=['author']),
+            reverse('posts:index'),
+        )
+        for url in urls:
+            client.get(url)
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(url)
+                user_queries = [
+                    query for query in queries
+                    if 'FROM "auth_user"' in query['sql']
+                    and 'INNER JOIN' not in query['sql']]
+                self.assertEqual(user_queries, [])
+
+    def test_signup_adds_name_to_cached_filter(self):
+        """Регистрация дописывает имя в фильтр, а не сбрасывает его."""
+        lookups.username_filter()
+        User.objects.create_user(username='newcomer')
+        with self.assertNumQueries(0):
+            self.assertFalse(lookups.author_missing('newcomer'))
+        self.assertTrue(lookups.author_missing('stranger'))
+
+    def test_rename_and_deactivation_reset_cache(self):
+        user = User.objects.create_user(username='before')
+        self.assertEqual(lookups.get_author('before'), user)
+        user.username = 'after'
+        user.save()
+        self.assertIsNone(lookups.get_author('before'))
+        self.assertEqual(lookups.get_author('after').username, 'after')
+        purge.schedule(user)
+        self.assertIsNone(lookups.get_author('after'))
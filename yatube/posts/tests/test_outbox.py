@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import outbox
+from core.models import Event
+
+from .. import moderation
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class OutboxEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def events(self):
+        return [(event.topic, event.action, outbox.payload(event))
+                for event in Event.objects.all()]
+
+    def test_views_record_events(self):
+        """Изменения через страницы сайта попадают в outbox."""
+        self.client.post(reverse('posts:post_create'),
+                         {'text': 'Пост', 'group': self.group.pk})
+        post = Post.objects.get()
+        self.client.post(reverse('posts:post_edit', args=[post.pk]),
+                         {'text': 'Правка'})
+        self.client.post(reverse('posts:add_comment', args=[post.pk]),
+                         {'text': 'Комментарий'})
+        self.client.get(reverse('posts:profile_follow',
+                                args=[self.reader.username]))
+        self.client.get(reverse('posts:profile_unfollow',
+                                args=[self.reader.username]))
+        follow = {'user': self.author.pk, 'author': self.reader.pk}
+        self.assertEqual(self.events(), [
+            ('post', outbox.CREATED,
+             {'author': self.author.pk, 'group': self.group.pk}),
+            ('post', outbox.UPDATED, {'author': self.author.pk,
+                                      'group': None}),
+            ('comment', outbox.CREATED,
+             {'post': post.pk, 'author': self.author.pk}),
+            ('follow', outbox.CREATED, follow),
+            ('follow', outbox.DELETED, follow),
+        ])
+
+    def test_invalid_form_records_nothing(self):
+        self.client.post(reverse('posts:post_create'), {'text': ''})
+        self.assertFalse(Event.objects.exists())
+
+    def test_admin_records_events(self):
+        """Сохранение и удаление в админке тоже пишут события."""
+        self.client.force_login(self.admin)
+        self.client.post(
+            reverse('admin:posts_group_change', args=[self.group.pk]),
+            {'title': 'Новое название', 'slug': self.group.slug,
+             'description': 'Описание', 'is_active': 'on'})
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader,
+                               text='Комментарий')
+        self.client.post(reverse('admin:posts_post_delete', args=[post.pk]),
+                         {'post': 'yes'})
+        self.assertFalse(Post.objects.exists())
+        self.assertEqual(self.events(), [
+            ('group', outbox.UPDATED, {'slug': self.group.slug}),
+            ('comment', outbox.DELETED, {}),
+            ('post', outbox.DELETED,
+             {'author': self.author.pk, 'group': None}),
+        ])
+
+    def test_bulk_delete_records_comment_events(self):
+        """Массовое удаление пишет события и о комментариях постов."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        moderation.delete_posts([post.pk])
+        self.assertEqual(
+            list(Event.objects.values_list('topic', 'action', 'object_id')),
+            [('post', outbox.DELETED, post.pk),
+             ('comment', outbox.DELETED, comment.pk)])
@@ -0,0 +1,313 @@
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from .. import cache as page_cache
+from ..cache import TwoTierCache, feed, generations, stampede_metrics
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост',
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def assertCached(self, url, client=None):
+        client = client or self.guest_client
+        client.get(url)
+        with self.assertNumQueries(0):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context)
+        return response
+
+    def test_anonymous_pages_served_from_cache(self):
+        """Повторный запрос анонима не трогает базу и шаблоны."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=1',
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertCached(url)
+
+    def test_session_cookie_bypasses_cache(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        self.assertIn(settings.SESSION_COOKIE_NAME,
+                      self.authorized_client.cookies)
+        response = self.authorized_client.get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_feeds(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Свежий пост',
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_group_change_invalidates_previous_group(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(url)
+        other = Group.objects.create(title='Другая', slug='other',
+                                     description='Описание')
+        self.post.group = other
+        self.post.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_comment_invalidates_post_detail(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.guest_client.get(url)
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Новый комментарий')
+        self.assertContains(self.guest_client.get(url), 'Новый комментарий')
+
+    def test_rename_invalidates_author_pages(self):
+        """Переименование автора сбрасывает все страницы с его именем."""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        old_profile = reverse('posts:profile', kwargs={'username': 'author'})
+        for url in urls + (old_profile,):
+            self.assertCached(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'renamed'
+        author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'renamed')
+        self.assertEqual(self.guest_client.get(old_profile).status_code, 404)
+
+    def test_signup_keeps_index_cached(self):
+        url = reverse('posts:index')
+        self.assertCached(url)
+        User.objects.create_user(username='newcomer')
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    def test_other_feeds_stay_cached(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Без группы')
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.assertIsNotNone(self.guest_client.get(url).context)
+
+
+class CommitBumpTests(TransactionTestCase):
+    """Поколения лент сдвигаются и после фиксации транзакции."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def test_generation_changes_after_commit(self):
+        with transaction.atomic():
+            post = Post.objects.create(author=self.author, text='Пост')
+            # Параллельный запрос собрал страницу до фиксации
+            feeds = (feed('index'), feed('profile', 'author'))
+            before_commit = generations(feeds)
+        self.assertNotEqual(generations(feeds), before_commit)
+        with transaction.atomic():
+            Comment.objects.create(post=post, author=self.author,
+                                   text='Ответ')
+            before_commit = generations([feed('post', post.pk)])
+        self.assertNotEqual(generations([feed('post', post.pk)]),
+                            before_commit)
+
+
+@override_settings(LOCAL_CACHE_SIZE=2, LOCAL_CACHE_TIMEOUT=60)
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = TwoTierCache()
+        self.second = TwoTierCache()
+
+    def test_hot_reads_stay_in_process(self):
+        """Повторное чтение берётся из LRU, а не из общего кэша."""
+        self.first.set('key', ['значение'])
+        cache.set('key', ['другое'])
+        value = self.first.get('key')
+        self.assertEqual(value, ['значение'])
+        value.append('изменено')
+        self.assertEqual(self.first.get('key'), ['значение'])
+        self.assertEqual(self.first.get_many(['key', 'missing']),
+                         {'key': ['значение']})
+
+    def test_lru_and_ttl(self):
+        for key in ('a', 'b', 'c'):
+            self.first.set(key, key)
+            cache.set(key, key.upper())
+        self.assertEqual([self.first.get(key) for key in ('c', 'b', 'a')],
+                         ['c', 'b', 'A'])
+        with override_settings(LOCAL_CACHE_TIMEOUT=0.01):
+            self.first.set('d', 'd')
+        cache.set('d', 'D')
+        time.sleep(0.02)
+        self.assertEqual(self.first.get('d'), 'D')
+
+    @mock.patch.object(page_cache, 'VERSION_CHECK_INTERVAL', 0)
+    def test_invalidation_reaches_other_processes(self):
+        """delete и incr в одном процессе сбрасывают копии у остальных."""
+        self.first.set('page', 'старая страница')
+        self.first.set('generation', 1)
+        self.assertEqual(self.second.get('page'), 'старая страница')
+        self.assertEqual(self.second.get('generation'), 1)
+        self.first.delete('page')
+        self.assertIsNone(self.second.get('page'))
+        self.first.incr('generation')
+        self.assertEqual(self.second.get('generation'), 2)
+
+    @mock.patch.object(page_cache, 'VERSION_CHECK_INTERVAL', 0)
+    def test_invalidation_keeps_other_hot_keys(self):
+        """Сбрасываются только изменённые ключи, а не весь LRU."""
+        self.first.delete('other')  # счётчик версии уже есть в кэше
+        self.second.set('hot', 'горячая страница')
+        self.first.set('generation', 1)
+        self.second.get('generation')
+        cache.set('hot', 'из общего кэша')
+        self.first.incr('generation')
+        self.assertEqual(self.second.get('generation'), 2)
+        self.assertEqual(self.second.get('hot'), 'горячая страница')
+
+    @mock.patch.object(page_cache, 'VERSION_CHECK_INTERVAL', 0)
+    def test_lost_journal_clears_local_tier(self):
+        self.second.set('hot', 'горячая страница')
+        cache.set('hot', 'из общего кэша')
+        self.first.delete('other')
+        cache.delete(page_cache._journal_key(
+            cache.get(page_cache.LOCAL_VERSION_KEY)))
+        self.assertEqual(self.second.get('hot'), 'из общего кэша')
+
+    @override_settings(LOCAL_CACHE_SIZE=0)
+    def test_disabled_local_tier(self):
+        self.first.set('key', 'значение')
+        cache.set('key', 'другое')
+        self.assertEqual(self.first.get('key'), 'другое')
+
+
+# Тесты пишут прямо в общий кэш, поэтому локальный уровень выключен
+@override_settings(LOCAL_CACHE_SIZE=0)
+class StampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TwoTierCache()
+        self.calls = []
+
+    def compute(self, value='страница', pause=0):
+        def run():
+            self.calls.append(value)
+            time.sleep(pause)
+            return value
+        return run
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи пересчитывают значение один раз."""
+        results = []
+
+        def request():
+            results.append(self.cache.get_or_compute(
+                'key', self.compute(pause=0.2), 60))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['страница'] * 8)
+        self.assertEqual(self.calls, ['страница'])
+        metrics = stampede_metrics()
+        self.assertEqual(metrics['rebuilt'], 1)
+        self.assertEqual(metrics['suppressed'], 7)
+
+    def test_stale_value_served_while_rebuilding(self):
+        self.cache.get_or_compute('key', self.compute('старая'), 60)
+        value, fresh_until, delta = cache.get('key')
+        cache.set('key', (value, time.time() - 1, delta))
+        cache.add('lock:key', 1)
+        self.assertEqual(
+            self.cache.get_or_compute('key', self.compute('новая'), 60),
+            'старая')
+        cache.delete('lock:key')
+        self.assertEqual(
+            self.cache.get_or_compute('key', self.compute('новая'), 60),
+            'новая')
+        self.assertEqual(stampede_metrics()['stale'], 1)
+
+    def test_early_refresh_and_storable(self):
+        cache.set('key', ('старая', time.time() + 1, 10))
+        with mock.patch.object(page_cache.random, 'random',
+                               return_value=0.999999):
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute('новая'), 60),
+                'новая')
+        self.assertEqual(stampede_metrics()['early'], 1)
+        with mock.patch.object(page_cache.random, 'random', return_value=0):
+            self.assertEqual(
+                self.cache.get_or_compute('key', self.compute('ещё'), 60),
+                'новая')
+        self.cache.get_or_compute('other', self.compute('ошибка'), 60,
+                                  storable=lambda value: False)
+        self.assertIsNone(cache.get('other'))
+
+    def test_unstored_result_releases_waiters(self):
+        """Ждущие не спят LOCK_WAIT, если ответ не попал в кэш."""
+        results = []
+
+        def request():
+            results.append(self.cache.get_or_compute(
+                'key', self.compute('404', pause=0.2), 60,
+                storable=lambda value: False))
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['404'] * 4)
+        self.assertLess(time.monotonic() - started, page_cache.LOCK_WAIT)
+        self.assertEqual(stampede_metrics()['unstored'], 3)
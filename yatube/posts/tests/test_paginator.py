@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+from ..utils import page_window
+
+User = get_user_model()
+LIMIT: int = 10
+
+
+class FakePage:
+    def __init__(self, number, num_pages):
+        self.number = number
+        self.paginator = type('Paginator', (), {'num_pages': num_pages})
+
+
+class PageWindowTests(TestCase):
+    def test_window(self):
+        cases = (
+            (1, 1, [1]),
+            (1, 4, [1, 2, 3, 4]),
+            (1, 100, [1, 2, 3, None, 100]),
+            (4, 100, [1, 2, 3, 4, 5, 6, None, 100]),
+            (50, 100, [1, None, 48, 49, 50, 51, 52, None, 100]),
+            (100, 100, [1, None, 98, 99, 100]),
+            (50, 10 ** 6, [1, None, 48, 49, 50, 51, 52, None, 10 ** 6]),
+        )
+        for number, num_pages, expected in cases:
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(
+                    page_window(FakePage(number, num_pages)), expected)
+
+
+class PaginatorSizeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def add_posts(self, count):
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Пост', group=self.group)
+            for _ in range(count)
+        ])
+
+    def test_response_size_does_not_grow_with_posts(self):
+        """Навигация не растёт вместе с числом страниц во всех лентах."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+        )
+        self.add_posts(LIMIT * 20)
+        small = {url: self.client.get(url + '?page=10') for url in urls}
+        cache.clear()
+        self.add_posts(LIMIT * 980)
+        for url in urls:
+            with self.subTest(url=url):
+                large = self.client.get(url + '?page=10')
+                self.assertEqual(
+                    large.content.count(b'page-item'),
+                    small[url].content.count(b'page-item'))
+                # Отличается только число цифр в id постов и номерах страниц,
+                # а одна лишняя ссылка на страницу заняла бы ~100 байт.
+                self.assertLess(
+                    len(large.content) - len(small[url].content), 50)
@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Event
+
+from .. import moderation
+from ..models import Comment, Follow, Group, Post, Purge
+from ..purge import purge_pending, schedule
+from ..stream import fetch_new
+
+User = get_user_model()
+
+
+class PurgeTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Пост {i}')
+            for i in range(5)
+        ]
+        self.other = Post.objects.create(author=self.reader,
+                                         group=self.group, text='Чужой')
+        Comment.objects.create(post=self.posts[0], author=self.reader,
+                               text='Комментарий к посту автора')
+        Comment.objects.create(post=self.other, author=self.author,
+                               text='Комментарий автора')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        self.guest_client = Client()
+
+    def test_scheduled_user_is_hidden_at_once(self):
+        """Скрытый автор пропадает с сайта до удаления его записей."""
+        schedule(self.author)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        for url in (
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.posts[0].pk]),
+            reverse('posts:api_profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+    def test_scheduled_user_comments_are_hidden_at_once(self):
+        """Комментарии скрытого автора пропадают до очистки."""
+        schedule(self.author)
+        for url in (
+            reverse('posts:post_detail', args=[self.other.pk]),
+            reverse('posts:api_post_detail', args=[self.other.pk]),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Комментарий автора')
+        messages, _ = fetch_new((0, 0))
+        self.assertFalse([event for _, event in messages
+                          if 'Комментарий автора' in event])
+
+    def test_scheduled_group_is_hidden_at_once(self):
+        """Скрытая группа пропадает с сайта, а её посты остаются."""
+        group_url = reverse('posts:group_list', args=[self.group.slug])
+        self.assertContains(self.guest_client.get(reverse('posts:index')),
+                            group_url)
+        schedule(self.group)
+        self.assertEqual(self.guest_client.get(group_url).status_code, 404)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(len(response.context['page_obj']), 6)
+        self.assertNotContains(response, group_url)
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.other.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, group_url)
+
+    def test_purge_user_in_chunks(self):
+        """Очистка удаляет записи автора порциями и потом его самого."""
+        schedule(self.author)
+        with mock.patch.object(moderation, 'CHUNK_SIZE', 2), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_pending(), 1)
+        post_deletes = [query for query in queries.captured_queries
+                        if query['sql'].startswith('DELETE FROM "posts_post"')]
+        self.assertEqual(len(post_deletes), 3)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.other])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Purge.objects.exists())
+
+    def test_purge_group_keeps_posts(self):
+        """Очистка группы убирает группу у постов, не удаляя их."""
+        schedule(self.group)
+        call_command('purge', pause=0, stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_admin_delete_button_schedules_purge(self):
+        """Кнопка удаления в форме админки тоже удаляет в фоне."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_group_delete', args=[self.group.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'FROM "posts_post"' in query['sql']])
+        client.post(url, {'post': 'yes'})
+        self.assertFalse(Group.objects.get(pk=self.group.pk).is_active)
+        self.assertTrue(Purge.objects.filter(
+            kind=Purge.GROUP, object_id=self.group.pk).exists())
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 6)
+        self.assertEqual(Event.objects.filter(
+            topic='group', action=Event.DELETED).count(), 1)
+
+    def test_reactivated_object_is_not_purged(self):
+        schedule(self.group)
+        Group.objects.filter(pk=self.group.pk).update(is_active=True)
+        self.assertEqual(purge_pending(), 0)
+        self.assertTrue(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertFalse(Purge.objects.exists())
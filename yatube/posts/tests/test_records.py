@@ -0,0 +1,88 @@
+import pickle
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import records
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, LOCAL_CACHE_SIZE=0)
+class PostRecordTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text='Длинный текст ' * 50)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_round_trip(self):
+        post = Post.objects.select_related('author', 'group').get()
+        data = records.encode(post)
+        record = records.decode(data)
+        self.assertEqual(record, post)
+        self.assertEqual(record.author, self.author)
+        self.assertEqual(record.group, self.group)
+        self.assertEqual(
+            (record.excerpt, record.pub_date, record.updated, record.image,
+             record.author.get_full_name(), record.group.slug),
+            (post.excerpt, post.pub_date, post.updated, '', 'Лев Толстой',
+             'test-slug'))
+        self.assertLess(len(pickle.dumps(data)), len(pickle.dumps(post)))
+        self.assertIsNone(
+            records.decode((records.RECORD_VERSION + 1,) + data[1:]))
+
+    def test_get_records_reads_database_once(self):
+        with self.assertNumQueries(1):
+            found = records.get_records([self.post.pk, 0], Post.objects)
+        self.assertEqual(list(found), [self.post.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                records.get_records([self.post.pk], Post.objects), found)
+
+    def test_feed_page_rendered_from_records(self):
+        """Первая страница ленты не читает строки постов из базы."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse([query for query in queries
+                          if '"posts_post"."text"' in query['sql']])
+        self.assertContains(response, 'Лев Толстой')
+        self.assertContains(
+            response, reverse('posts:group_list', args=['test-slug']))
+
+    def test_edits_reset_records(self):
+        """Правка автора, группы или поста сбрасывает записи постов."""
+        url = reverse('posts:index')
+
+        def first_record():
+            return self.client.get(url).context['page_obj'][0]
+
+        first_record()
+        self.author.first_name = 'Николай'
+        self.author.save()
+        self.assertEqual(first_record().author.get_full_name(),
+                         'Николай Толстой')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(first_record().group.title, 'Новое название')
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertEqual(first_record().excerpt, 'Исправленный текст')
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import rings
+from ..cache import feed
+from ..models import Group, Post
+from ..views import LIMIT
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0, LOCAL_CACHE_SIZE=0)
+class FeedRingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.other = Group.objects.create(
+            title='Другая группа',
+            description='Описание',
+            slug='other',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(LIMIT + 3))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.urls = {
+            feed('index'): reverse('posts:index'),
+            feed('group', 'test-slug'): reverse('posts:group_list',
+                                                args=['test-slug']),
+            feed('profile', 'author'): reverse('posts:profile',
+                                               args=['author']),
+        }
+
+    def page_ids(self, url):
+        return [post.pk for post in self.client.get(url).context['page_obj']]
+
+    def expected_ids(self, posts, page=1):
+        ids = list(posts.order_by('-pub_date', '-pk')
+                   .values_list('pk', flat=True))
+        return ids[(page - 1) * LIMIT:page * LIMIT]
+
+    def test_first_pages_skip_ordered_query(self):
+        """Страница из кольца читается по id, без сортировки по pub_date."""
+        for url in self.urls.values():
+            self.client.get(url)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    ids = self.page_ids(url)
+                self.assertEqual(ids, self.expected_ids(Post.objects))
+                # Last-Modified по-прежнему берёт одну дату по индексу
+                self.assertFalse([
+                    query for query in queries
+                    if '"posts_post"."text"' in query['sql']
+                    and 'ORDER BY' in query['sql']])
+
+    def test_new_and_deleted_posts_update_rings(self):
+        for url in self.urls.values():
+            self.client.get(url)
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Новый')
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                ids, _ = cache.get(rings._key(name))
+                self.assertEqual(ids[0], post.pk)
+                self.assertEqual(self.page_ids(url)[0], post.pk)
+        post.delete()
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                self.assertNotIn(post.pk, cache.get(rings._key(name))[0])
+
+    def test_group_change_moves_post(self):
+        group_url = self.urls[feed('group', 'test-slug')]
+        other_url = reverse('posts:group_list', args=['other'])
+        self.client.get(group_url)
+        self.client.get(other_url)
+        post = Post.objects.latest('pk')
+        post.group = self.other
+        post.save()
+        self.assertNotIn(post.pk, self.page_ids(group_url))
+        self.assertEqual(self.page_ids(other_url), [post.pk])
+
+    @mock.patch.object(rings, 'RING_SIZE', 5)
+    def test_pages_beyond_ring_and_stale_ring(self):
+        url = reverse('posts:index')
+        self.assertEqual(self.page_ids(url + '?page=2'),
+                         self.expected_ids(Post.objects, page=2))
+        key = rings._key(feed('index'))
+        ids, complete = cache.get(key)
+        self.assertEqual((len(ids), complete), (5, False))
+        # id поста из откаченной транзакции
+        cache.set(key, ([ids[0] + 100] + ids, True))
+        self.assertEqual(self.page_ids(url), self.expected_ids(Post.objects))
+        self.assertIsNone(cache.get(key))
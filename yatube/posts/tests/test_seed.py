@@ -0,0 +1,50 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..seeding import seed
+
+User = get_user_model()
+
+
+class SeedTests(TestCase):
+    def test_seed_creates_requested_rows(self):
+        """seed создаёт записи пачками в нужном количестве."""
+        created = seed(users=30, groups=4, posts=200, comments=50,
+                       follows=5, batch_size=64)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertEqual(Follow.objects.count(), created['follows'])
+        self.assertFalse(
+            Follow.objects.filter(user_id=F('author_id')).exists())
+
+    def test_seed_power_law(self):
+        """Популярные авторы и группы получают больше постов."""
+        seed(users=50, groups=5, posts=500, comments=0, follows=3)
+        authors = list(Post.objects.values('author').annotate(
+            total=Count('id')).order_by('-total').values_list(
+                'total', flat=True))
+        self.assertGreater(authors[0], 5 * authors[-1])
+        groups = Group.objects.annotate(total=Count('posts')).order_by(
+            '-total').values_list('total', flat=True)
+        self.assertGreater(groups[0], groups[len(groups) - 1])
+
+    def test_seed_twice_does_not_collide(self):
+        """Повторный запуск не конфликтует с уже созданными данными."""
+        seed(users=5, groups=2, posts=10, comments=0, follows=1)
+        seed(users=5, groups=2, posts=10, comments=0, follows=1)
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 4)
+
+    def test_seed_command(self):
+        out = StringIO()
+        call_command('seed', users=3, groups=1, posts=5, comments=2,
+                     workers=0, stdout=out)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertIn('Готово', out.getvalue())
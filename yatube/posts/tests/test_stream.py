@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..stream import (Hub, Streamer, fetch_new, format_event, post_keys,
+                      resolve_feed)
+
+User = get_user_model()
+
+
+class HubTests(SimpleTestCase):
+    def test_publish_reaches_matching_feeds_once(self):
+        """Подписчик нескольких подходящих лент получает событие один раз."""
+        async def scenario():
+            hub = Hub()
+            both = hub.subscribe(['index', 'group:cats'])
+            group = hub.subscribe(['group:dogs'])
+            post = hub.subscribe(['post:1'])
+            delivered = hub.publish(post_keys(1, 'cats'), 'новый пост')
+            return delivered, both.queue.qsize(), group.queue.qsize(), \
+                post.queue.qsize()
+
+        self.assertEqual(asyncio.run(scenario()), (1, 1, 0, 0))
+
+    def test_unsubscribe_and_overflow(self):
+        async def scenario():
+            hub = Hub()
+            slow = hub.subscribe(['index'], size=1)
+            hub.publish(['index'], 'первое')
+            hub.publish(['index'], 'второе')
+            overflowed = slow.overflowed
+            hub.unsubscribe(slow)
+            return overflowed, len(hub), hub.publish(['index'], 'третье')
+
+        self.assertEqual(asyncio.run(scenario()), (True, 0, 0))
+
+    def test_server_streams_events(self):
+        """Сервер отдаёт text/event-stream и события подписанной ленты."""
+        message = format_event('post', 1, {'id': 1})
+        sent = []
+
+        def fetch(cursor):
+            if sent:
+                return [], cursor
+            sent.append(True)
+            return [(['index'], message)], cursor
+
+        async def scenario():
+            streamer = Streamer(fetch=fetch, poll_interval=0.01,
+                                heartbeat=0.01, cursor=(0, 0))
+            server = await asyncio.start_server(streamer.handle,
+                                                '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /stream/?feed=index HTTP/1.1\r\n'
+                         b'Host: localhost\r\n\r\n')
+            headers = await reader.readuntil(b'retry: 5000\n\n')
+            while not len(streamer.hub):
+                await asyncio.sleep(0.01)
+            poller = asyncio.ensure_future(streamer.poll())
+            body = b': ping\n\n'
+            while body == b': ping\n\n':
+                body = await asyncio.wait_for(reader.readuntil(b'\n\n'), 5)
+            poller.cancel()
+            writer.close()
+            # Отключившийся клиент замечается на следующем ping
+            while len(streamer.hub):
+                await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+            return headers.decode(), body.decode()
+
+        headers, body = asyncio.run(scenario())
+        self.assertIn('200 OK', headers)
+        self.assertIn('Content-Type: text/event-stream', headers)
+        self.assertEqual(body, message)
+
+
+class StreamFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_fetch_new_by_cursor(self):
+        """Новые посты и комментарии читаются после курсора."""
+        old = Post.objects.create(author=self.author, text='Старый')
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text='Новый')
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        messages, cursor = fetch_new((old.pk, 0))
+        self.assertEqual(cursor, (post.pk, comment.pk))
+        (post_keys_, post_event), (comment_keys, comment_event) = messages
+        self.assertEqual(post_keys_, post_keys(self.author.pk, 'test-slug'))
+        self.assertEqual(comment_keys, [f'post:{post.pk}'])
+        data = json.loads(post_event.split('data: ')[1])
+        self.assertEqual(data['url'],
+                         reverse('posts:post_detail', args=[post.pk]))
+        self.assertEqual(fetch_new(cursor), ([], cursor))
+
+    def test_resolve_feed(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        client = Client()
+        client.force_login(self.reader)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+        cases = (
+            ({'feed': 'index'}, None, ['index']),
+            ({'feed': 'group', 'slug': 'test-slug'}, None,
+             ['group:test-slug']),
+            ({'feed': 'group', 'slug': 'missing'}, None, None),
+            ({'feed': 'profile', 'username': 'author'}, None,
+             [f'author:{self.author.pk}']),
+            ({'feed': 'post', 'id': str(post.pk)}, None, [f'post:{post.pk}']),
+            ({'feed': 'follow'}, None, None),
+            ({'feed': 'follow'}, session_key, [f'author:{self.author.pk}']),
+            ({'feed': 'unknown'}, None, None),
+        )
+        for params, key, expected in cases:
+            with self.subTest(params=params, session=bool(key)):
+                self.assertEqual(resolve_feed(params, key), expected)
+
+    @override_settings(STREAM_URL='/stream/')
+    def test_pages_subscribe_to_stream(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        response = Client().get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, 'EventSource')
+        self.assertContains(response, f'&id={post.pk}')
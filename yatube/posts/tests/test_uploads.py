@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..storage import S3Storage
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DirectUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.other = User.objects.create_user(username='other')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, client=None, content_type='image/gif', body=SMALL_GIF):
+        client = client or self.authorized_client
+        upload = client.post(reverse('posts:upload_url'),
+                             {'content_type': content_type}).json()
+        data = dict(upload['fields'])
+        data['file'] = SimpleUploadedFile('small.gif', body, content_type)
+        response = Client().post(upload['url'], data)
+        return upload['key'], response
+
+    def test_post_created_with_uploaded_key(self):
+        """Пост сохраняется с ключом картинки, загруженной отдельно."""
+        key, response = self.upload()
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(key.startswith(f'posts/uploads/{self.user.pk}/'))
+        self.assertTrue(default_storage.exists(key))
+        self.authorized_client.post(reverse('posts:post_create'),
+                                    {'text': 'С картинкой', 'image_key': key})
+        post = Post.objects.get(text='С картинкой')
+        self.assertEqual(post.image.name, key)
+
+    def test_foreign_or_missing_key_rejected(self):
+        key, _ = self.upload()
+        other_client = Client()
+        other_client.force_login(self.other)
+        missing = f'posts/uploads/{self.user.pk}/missing.gif'
+        for client, image_key in ((other_client, key),
+                                  (self.authorized_client, missing)):
+            with self.subTest(image_key=image_key):
+                response = client.post(
+                    reverse('posts:post_create'),
+                    {'text': 'Чужая картинка', 'image_key': image_key})
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    def test_upload_checks(self):
+        bad_type = self.authorized_client.post(
+            reverse('posts:upload_url'), {'content_type': 'text/html'})
+        self.assertEqual(bad_type.status_code, 400)
+        _, not_image = self.upload(body=b'GIF89a but not really')
+        self.assertEqual(not_image.status_code, 400)
+        forged = Client().post(reverse('posts:upload_image'), {
+            'token': 'forged',
+            'file': SimpleUploadedFile('a.gif', SMALL_GIF, 'image/gif')})
+        self.assertEqual(forged.status_code, 403)
+
+    def test_sign_requires_login(self):
+        response = Client().post(reverse('posts:upload_url'),
+                                 {'content_type': 'image/gif'})
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(S3_BUCKET='yatube', S3_PUBLIC_URL='https://cdn.test/')
+class S3StorageTests(TestCase):
+    def test_presigned_upload_limits_size_and_type(self):
+        client = mock.Mock()
+        client.generate_presigned_post.return_value = {
+            'url': 'https://s3.test/yatube', 'fields': {'key': 'k'}}
+        storage = S3Storage(client=client)
+        upload = storage.presigned_upload('posts/uploads/1/a.gif',
+                                          'image/gif', 100, 60)
+        self.assertEqual(upload['url'], 'https://s3.test/yatube')
+        kwargs = client.generate_presigned_post.call_args.kwargs
+        self.assertEqual(kwargs['Bucket'], 'yatube')
+        self.assertIn(['content-length-range', 1, 100],
+                      kwargs['Conditions'])
+        self.assertEqual(storage.url('posts/uploads/1/a.gif'),
+                         'https://cdn.test/posts/uploads/1/a.gif')
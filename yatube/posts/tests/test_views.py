@@ -17,7 +17,8 @@ LIMIT: int = 10
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_CACHE_TIMEOUT=0,
+                   LOCAL_CACHE_SIZE=0)
 class PostsURLTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -72,7 +73,7 @@ class PostsURLTests(TestCase):
         """Шаблон index сформирован с правильным контекстом."""
         response = self.authorized_client.get(reverse('posts:index'))
         first_object = response.context['page_obj'][0]
-        post_text = first_object.text
+        post_text = first_object.excerpt
         post_author = self.author.username
         post_group = first_object.group.title
         self.assertEqual(post_text, 'Тестовый пост')
@@ -85,7 +86,7 @@ class PostsURLTests(TestCase):
                                               kwargs={'slug': 'test-slug'}))
         first_object_group = response.context['page_obj'][0]
         post_author_0 = first_object_group.author.username
-        post_text_0 = first_object_group.text
+        post_text_0 = first_object_group.excerpt
         self.assertEqual(post_author_0, self.user.username)
         self.assertEqual(post_text_0, 'Тестовый пост')
 
@@ -263,3 +264,25 @@ class PostsURLTests(TestCase):
         follow_index = response_follow.context['page_obj']
         posts = Post.objects.filter(author__following__user=self.user)
         self.assertNotIn(follow_index, posts)
+
+    def test_post_card_refreshes_after_edit(self):
+        """Карточка поста перерисовывается после редактирования."""
+        url = reverse('posts:profile', kwargs={'username': 'user'})
+        post = Post.objects.filter(author=self.user).first()
+        self.authorized_client.get(url)
+        post.text = 'Отредактированный пост'
+        post.save()
+        self.assertContains(self.authorized_client.get(url),
+                            'Отредактированный пост')
+
+    def test_post_card_refreshes_after_renames(self):
+        """Карточка показывает новые имена автора и группы."""
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        self.user.first_name = 'Переименованный'
+        self.user.save()
+        self.group.title = 'Новое название группы'
+        self.group.save()
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Переименованный')
+        self.assertContains(response, 'Новое название группы')
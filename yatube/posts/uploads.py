@@ -0,0 +1,75 @@
+"""Прямая загрузка картинок постов в хранилище.
+
+upload_url выдаёт подписанную форму загрузки под уникальный ключ.
+Клиент отправляет картинку прямо в хранилище, а потом сохраняет пост
+с этим ключом в поле image_key. upload_image принимает загрузки только
+для локального хранилища UploadFileSystemStorage.
+"""
+import uuid
+
+from django import forms
+from django.contrib.auth.decorators import login_required
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .forms import upload_prefix
+
+ALLOWED_IMAGE_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+MAX_IMAGE_SIZE: int = 10 * 1024 * 1024
+UPLOAD_EXPIRES: int = 15 * 60
+
+
+def _error(detail, status):
+    return JsonResponse({'detail': detail}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+@require_POST
+def upload_url(request):
+    content_type = request.POST.get('content_type', '')
+    extension = ALLOWED_IMAGE_TYPES.get(content_type)
+    if extension is None:
+        return _error('Неподдерживаемый тип картинки', 400)
+    presigned_upload = getattr(default_storage, 'presigned_upload', None)
+    if presigned_upload is None:
+        return _error('Хранилище не поддерживает прямую загрузку', 501)
+    key = f'{upload_prefix(request.user)}{uuid.uuid4().hex}{extension}'
+    upload = presigned_upload(key, content_type, MAX_IMAGE_SIZE,
+                              UPLOAD_EXPIRES)
+    return JsonResponse({'key': key, **upload})
+
+
+@csrf_exempt
+@require_POST
+def upload_image(request):
+    """Приёмник подписанных загрузок локального хранилища."""
+    check_upload = getattr(default_storage, 'check_upload', None)
+    if check_upload is None:
+        return _error('Хранилище принимает загрузки само', 404)
+    try:
+        upload = check_upload(request.POST.get('token', ''), UPLOAD_EXPIRES)
+    except signing.BadSignature:
+        return _error('Подпись недействительна или устарела', 403)
+    image = request.FILES.get('file')
+    if image is None or image.size > upload['size']:
+        return _error('Нет файла или он слишком большой', 400)
+    if image.content_type != upload['type']:
+        return _error('Тип файла не совпадает с подписанным', 400)
+    try:
+        forms.ImageField().clean(image)
+    except ValidationError:
+        return _error('Файл не является картинкой', 400)
+    if default_storage.exists(upload['key']):
+        return _error('Файл с этим ключом уже загружен', 409)
+    default_storage.save(upload['key'], image)
+    return HttpResponse(status=204)
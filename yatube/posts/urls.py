@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, fragments, uploads, views
 
 app_name = 'posts'
 
@@ -24,4 +24,19 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/posts/<int:post_id>/', api.post_detail,
+         name='api_post_detail'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path('fragments/posts/', fragments.index, name='fragment_index'),
+    path('fragments/group/<slug:slug>/', fragments.group_posts,
+         name='fragment_group_list'),
+    path('fragments/profile/<str:username>/', fragments.profile,
+         name='fragment_profile'),
+    path('fragments/follow/', fragments.follow_index,
+         name='fragment_follow_index'),
+    path('uploads/sign/', uploads.upload_url, name='upload_url'),
+    path('uploads/', uploads.upload_image, name='upload_image'),
 ]
@@ -1,8 +1,114 @@
+import base64
+import binascii
+
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_WINDOW: int = 2
+EXCERPT_LENGTH: int = 300
+ELLIPSIS: str = '…'
 
 
 def paginator_for_page(posts, request, LIMIT):
     paginator = Paginator(posts, LIMIT)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.window = page_window(page_obj)
     return page_obj
+
+
+def page_window(page_obj, on_each_side=PAGE_WINDOW):
+    """Номера страниц для навигации: окно вокруг текущей, первая и последняя.
+
+    Пропуски обозначаются None. Полный page_range не строится, поэтому
+    размер навигации не зависит от числа страниц.
+    """
+    last = page_obj.paginator.num_pages
+    start = max(page_obj.number - on_each_side, 1)
+    end = min(page_obj.number + on_each_side, last)
+    window = list(range(start, end + 1))
+    if start > 1:
+        window[:0] = [1] if start == 2 else [1, None]
+    if end < last:
+        window += [last] if end == last - 1 else [None, last]
+    return window
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Начало текста для ленты: до length символов по границе слова."""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS
+
+
+def encode_cursor(post):
+    """Курсор на пост: дата публикации и id, закодированные в base64."""
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает (pub_date, pk) из курсора или None, если курсор битый."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def next_fragment_url(page_obj, url):
+    """Адрес фрагмента с постами, идущими за последним постом страницы."""
+    if not page_obj.has_next():
+        return None
+    return f'{url}?cursor={encode_cursor(page_obj[len(page_obj) - 1])}'
+
+
+def cursor_page(posts, cursor, limit):
+    """Порция постов, идущих после курсора, и курсор следующей порции.
+
+    В отличие от OFFSET-пагинации, запрос читает по индексу pub_date только
+    limit + 1 строк, как бы далеко ни листал клиент.
+    Битый курсор приводит к ValueError.
+    """
+    posts = posts.order_by('-pub_date', '-pk')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError('Некорректный курсор')
+        pub_date, pk = position
+        posts = posts.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+    batch = list(posts[:limit + 1])
+    if len(batch) <= limit:
+        return batch, None
+    return batch[:limit], encode_cursor(batch[limit - 1])
+
+
+def estimated_count(queryset):
+    """Примерное число строк таблицы без COUNT(*) по всей таблице.
+
+    PostgreSQL хранит оценку в статистике pg_class, в остальных СУБД
+    берётся максимальный первичный ключ — его отдаёт индекс.
+    """
+    model = queryset.model
+    conn = connections[queryset.db]
+    if conn.vendor == 'postgresql':
+        with conn.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    return model._default_manager.using(queryset.db).aggregate(
+        last=Max('pk'))['last'] or 0
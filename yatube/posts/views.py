@@ -1,50 +1,163 @@
+import hashlib
+
 from django.shortcuts import get_object_or_404, render
-from .utils import paginator_for_page
+from .utils import next_fragment_url, paginator_for_page
 from .models import Group, Post, Follow
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from . import events, lookups, rings
+from .cache import changed_at, feed, generations
 from .forms import PostForm, CommentForm
+from .tasks import make_thumbnail
 from django.shortcuts import redirect
+from django.urls import reverse
+from django.db import transaction
+from core import outbox
+from core.http import cache_policy, condition_for_anonymous
 
 
 User = get_user_model()
 LIMIT: int = 10
+FEED_MAX_AGE: int = 0
+
+
+def latest_update(posts):
+    """Время последней правки поста ленты: один запрос по индексу updated."""
+    return posts.order_by('-updated').values_list(
+        'updated', flat=True).first()
+
+
+def feed_last_modified(posts, *feeds):
+    """Last-Modified ленты: последняя правка поста или её лент.
+
+    Удаление поста, переименование автора или группы не оставляют следа
+    в updated, поэтому берётся и время последнего bump лент — иначе
+    Last-Modified после удаления самого нового поста ушёл бы назад.
+    """
+    return max(filter(None, (latest_update(posts), changed_at(feeds))),
+               default=None)
+
+
+def group_missing(request, slug):
+    """Группы нет или она скрыта; ответ запоминается в request."""
+    if getattr(request, '_group_missing', None) is None:
+        request._group_missing = not Group.objects.filter(
+            slug=slug, is_active=True).exists()
+    return request._group_missing
+
+
+def feed_etag(*feeds):
+    """ETag по поколениям лент.
+
+    Поколение растёт при любой записи в ленту, в том числе при удалении
+    поста, которое Last-Modified не отражает. Запроса к базе нет.
+    """
+    return hashlib.md5(repr(generations(feeds)).encode()).hexdigest()
+
+
+def feed_page(posts, request, ring=None):
+    """Страница ленты; авторы постов берутся из кэша, а не JOIN.
+
+    Первые страницы ленты с кольцом ring собираются из id кольца и
+    закэшированных записей постов.
+    """
+    page_obj = paginator_for_page(posts, request, LIMIT)
+    object_list = None
+    if ring is not None:
+        object_list = rings.page_posts(ring, posts, page_obj.number, LIMIT,
+                                       page_obj.paginator.count)
+    if object_list is None:
+        object_list = lookups.attach_authors(page_obj.object_list)
+    page_obj.object_list = object_list
+    return page_obj
 
 
+def index_last_modified(request):
+    return feed_last_modified(Post.objects.visible(), feed('index'))
+
+
+def group_last_modified(request, slug):
+    if group_missing(request, slug):
+        return None
+    return feed_last_modified(
+        Post.objects.visible().filter(group__slug=slug), feed('group', slug))
+
+
+def profile_last_modified(request, username):
+    if lookups.author_missing(username):
+        return None
+    return feed_last_modified(
+        Post.objects.visible().filter(author__username=username),
+        feed('profile', username))
+
+
+def index_etag(request):
+    return feed_etag(feed('index'))
+
+
+def group_etag(request, slug):
+    if group_missing(request, slug):
+        return None
+    return feed_etag(feed('group', slug))
+
+
+def profile_etag(request, username):
+    if lookups.author_missing(username):
+        return None
+    return feed_etag(feed('profile', username))
+
+
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(index_etag, index_last_modified)
 def index(request):
-    post_list = Post.objects.all()
+    post_list = Post.objects.visible().select_related('group').defer('text')
+    page_obj = feed_page(post_list, request, feed('index'))
     context = {
-        'page_obj': paginator_for_page(post_list, request, LIMIT), }
+        'page_obj': page_obj,
+        'more_url': next_fragment_url(
+            page_obj, reverse('posts:fragment_index')),
+    }
     return render(request, 'posts/index.html', context)
 
 
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(group_etag, group_last_modified)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    page_obj = feed_page(group.posts.visible().defer('text'), request,
+                         feed('group', slug))
     context = {
         'group': group,
-        'page_obj': paginator_for_page(posts, request, LIMIT),
+        'page_obj': page_obj,
+        'more_url': next_fragment_url(
+            page_obj, reverse('posts:fragment_group_list', args=[slug])),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_policy(FEED_MAX_AGE)
+@condition_for_anonymous(profile_etag, profile_last_modified)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.all()
-    following = request.user.is_authenticated and author.following.filter(
-        user=request.user).exists()
+    author = lookups.get_author_or_404(username)
+    user_posts = Post.objects.visible().filter(
+        author_id=author.pk).select_related('group').defer('text')
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author_id=author.pk).exists()
+    page_obj = feed_page(user_posts, request, feed('profile', username))
     context = {
         'author': author,
-        'page_obj': paginator_for_page(user_posts, request, LIMIT),
-        'following': following
+        'page_obj': page_obj,
+        'following': following,
+        'more_url': next_fragment_url(
+            page_obj, reverse('posts:fragment_profile', args=[username])),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = Post.objects.get(pk=post_id)
+    post = lookups.get_post_or_404(Post.objects.visible(), post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = post.comments.visible().select_related('author')
     context = {
         'post': post,
         'form': form,
@@ -55,11 +168,16 @@ def post_detail(request, post_id):
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None,)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    user=request.user)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            events.post_changed(post, outbox.CREATED)
+            if post.image:
+                make_thumbnail.delay(post.pk)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -73,10 +191,16 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        user=request.user,
     )
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            post = form.save()
+            events.post_changed(post, outbox.UPDATED)
+            if post.image and ('image' in form.changed_data
+                               or form.image_key):
+                make_thumbnail.delay(post.pk)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'form': form,
@@ -94,15 +218,22 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            events.comment_changed(comment, outbox.CREATED)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.visible().filter(
+        author__following__user=request.user
+    ).select_related('group').defer('text')
+    page_obj = feed_page(posts, request)
     context = {
-        'page_obj': paginator_for_page(posts, request, LIMIT),
+        'page_obj': page_obj,
+        'more_url': next_fragment_url(
+            page_obj, reverse('posts:fragment_follow_index')),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -110,19 +241,24 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=user, author=author)
+    author = lookups.get_author_or_404(username)
+    is_follower = Follow.objects.filter(user=user, author_id=author.pk)
     if user != author and not is_follower.exists():
-        Follow.objects.create(user=user, author=author)
+        with transaction.atomic():
+            follow = Follow.objects.create(user=user, author_id=author.pk)
+            events.follow_changed(follow, outbox.CREATED)
     return redirect('posts:follow_index')
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(
+    author = lookups.get_author_or_404(username)
+    follows = Follow.objects.filter(
         user=request.user,
-        author=author
+        author_id=author.pk
     )
-    follow.delete()
+    with transaction.atomic():
+        for follow in follows:
+            events.follow_changed(follow, outbox.DELETED)
+        follows.delete()
     return redirect('posts:follow_index')
@@ -0,0 +1,44 @@
+"""Кэш пользователя для AuthenticationMiddleware.
+
+Стандартный middleware на каждый запрос читает пользователя из базы.
+Здесь пользователь после первой загрузки берётся из кэша и проверяется
+так же, как в django.contrib.auth.get_user: по хешу авторизации в
+сессии, который зависит от пароля. Смена пароля разлогинивает старые
+сессии сразу, а сохранение или скрытие пользователя сбрасывает кэш.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+USER_CACHE_TIMEOUT: int = 60 * 5
+
+
+def _key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def get_user(request):
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    backend = session.get(BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+    user = cache.get(_key(user_id))
+    session_hash = session.get(HASH_SESSION_KEY)
+    if user is not None and session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash()):
+        user.backend = backend
+        return user
+    # Промах или устаревший хеш: полная проверка, которая при
+    # несовпадении хеша очищает сессию
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(_key(user.pk), user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def forget(user_id):
+    cache.delete(_key(user_id))
@@ -0,0 +1,22 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from .auth import get_user
+
+
+def get_cached_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кэша.
+
+    С SESSION_ENGINE на кэше или подписанных cookie запрос
+    авторизованного пользователя не делает ни одного запроса к базе ради
+    сессии и пользователя.
+    """
+
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
@@ -0,0 +1,20 @@
+from importlib import import_module
+
+from django.conf import settings
+
+from core.tasks import task
+
+SESSION_CLEANUP_INTERVAL: int = 60 * 60
+
+
+@task(every=SESSION_CLEANUP_INTERVAL)
+def clear_expired_sessions():
+    """Удаляет истёкшие сессии, как команда clearsessions.
+
+    Сессии в кэше истекают сами, у подписанных cookie хранилища нет.
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        pass
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import purge
+
+from . import auth
+from .tasks import clear_expired_sessions
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader',
+                                             password='secret-1')
+        self.client = Client()
+        self.client.login(username='reader', password='secret-1')
+        self.url = reverse('about:author')
+
+    def user_of_next_request(self):
+        return self.client.get(self.url).wsgi_request.user
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_authenticated_request_skips_database(self):
+        """С сессиями в кэше запрос не читает ни сессию, ни пользователя."""
+        client = Client()
+        client.login(username='reader', password='secret-1')
+        client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            user = client.get(self.url).wsgi_request.user
+            self.assertEqual(user, self.user)
+        self.assertEqual(len(queries), 0)
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.assertEqual(self.user_of_next_request(), self.user)
+        self.user.set_password('secret-2')
+        self.user.save()
+        self.assertFalse(self.user_of_next_request().is_authenticated)
+
+    def test_soft_deleted_user_is_logged_out(self):
+        self.assertEqual(self.user_of_next_request(), self.user)
+        purge.schedule(self.user)
+        self.assertFalse(self.user_of_next_request().is_authenticated)
+
+    def test_clear_expired_sessions(self):
+        Session.objects.update(expire_date=timezone.now() - timedelta(1))
+        clear_expired_sessions()
+        self.assertFalse(Session.objects.exists())
+
+
+class CachedUserCommitTests(TransactionTestCase):
+    def test_user_cached_before_commit_is_dropped(self):
+        """Пользователь, закэшированный до фиксации, сбрасывается после."""
+        cache.clear()
+        user = User.objects.create_user(username='reader',
+                                        password='secret-1')
+        client = Client()
+        client.login(username='reader', password='secret-1')
+        stale = User.objects.get(pk=user.pk)
+        with transaction.atomic():
+            user.is_active = False
+            user.save()
+            # Параллельный запрос прочитал пользователя до фиксации
+            cache.set(auth._key(user.pk), stale)
+        response = client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
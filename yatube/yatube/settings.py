@@ -23,7 +23,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = 'rc7*3h#_dremiz2*z4l!j@*da+szz512005*+cono4@*oit+oe'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -51,29 +51,40 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'posts.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # В продакшене шаблоны компилируются один раз на процесс
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year'
+                'core.context_processors.year.year',
+                'core.context_processors.stream.stream',
             ],
         },
     },
@@ -131,6 +142,16 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# STATIC_PIPELINE включается после collectstatic: имена файлов содержат
+# хэш, рядом лежат .gz и .br копии, а раздаёт их
+# core.middleware.StaticFilesMiddleware. Без собранного манифеста
+# {% static %} падал бы на каждой странице, поэтому от DEBUG он не зависит.
+STATIC_PIPELINE = os.getenv(
+    'STATIC_PIPELINE', 'False').lower() in ('1', 'true', 'yes')
+STATIC_SERVE = STATIC_PIPELINE
+if STATIC_PIPELINE:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -148,8 +169,46 @@ APPEND_SLASH = True
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Хранилище сессий: ...backends.db (по умолчанию), ...backends.cache и
+# ...backends.cached_db (нужен общий для всех процессов кэш в CACHES) или
+# ...backends.signed_cookies. Истёкшие сессии в базе удаляет воркер
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+
+# Полностраничный кэш для анонимов, секунды; 0 отключает кэш
+PAGE_CACHE_TIMEOUT = 0 if DEBUG else 60
+
+# Локальный LRU каждого процесса перед общим кэшем в posts.cache: число
+# ключей (0 отключает уровень) и время жизни копии, секунды
+LOCAL_CACHE_SIZE = 0 if DEBUG else 1000
+LOCAL_CACHE_TIMEOUT = 5
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто передаёт медиафайлы клиенту: 'django' (FileResponse с Range),
+# 'nginx' (X-Accel-Redirect во внутренний location) или 'sendfile'
+# (X-Sendfile для Apache и lighttpd)
+MEDIA_SERVER = os.getenv('MEDIA_SERVER', 'django')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Хранилище картинок постов. Клиент загружает картинку прямо в него по
+# подписанной форме. Для S3-совместимого хранилища (MinIO и т. п.)
+# укажите posts.storage.S3Storage и параметры S3_*
+DEFAULT_FILE_STORAGE = os.getenv(
+    'FILE_STORAGE', 'posts.storage.UploadFileSystemStorage')
+S3_BUCKET = os.getenv('S3_BUCKET', '')
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL', '')
+S3_ACCESS_KEY = os.getenv('S3_ACCESS_KEY', '')
+S3_SECRET_KEY = os.getenv('S3_SECRET_KEY', '')
+S3_REGION = os.getenv('S3_REGION', '')
+S3_PUBLIC_URL = os.getenv('S3_PUBLIC_URL', '')
+
+# Поток новых постов и комментариев (команда stream). STREAM_URL — адрес,
+# по которому прокси отдаёт поток браузеру; пустой адрес отключает
+# обновления на страницах
+STREAM_URL = os.getenv('STREAM_URL', '')
+STREAM_HOST = os.getenv('STREAM_HOST', '127.0.0.1')
+STREAM_PORT = int(os.getenv('STREAM_PORT', '8001'))